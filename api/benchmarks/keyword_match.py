@@ -0,0 +1,95 @@
+"""
+キーワードマッチのベンチマーク
+ビットマスク（bitset）とリスト走査（list）のマッチ数計算を比較する
+
+使い方:
+python -m api.benchmarks.keyword_match --facilities 5000 --queries 200
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+import numpy as np
+from api.services.facility_table import FacilityTable
+from api.utils.vibe_mapping import (
+    VIBE_KEYWORDS,
+    SENSATION_KEYWORDS,
+    get_vibe_keyword_set,
+    get_sensation_keyword_set,
+)
+
+
+def build_facilities(count: int, seed: int) -> List[dict]:
+    """ランダムなキーワードを持つ施設データを生成"""
+    rng = random.Random(seed)
+    mapped = sorted(
+        {keyword for keywords in VIBE_KEYWORDS.values() for keyword in keywords}
+        | {keyword for keywords in SENSATION_KEYWORDS.values() for keyword in keywords}
+    )
+    # マッピング外のキーワード（施設データにのみ出現）
+    extra = [f"特徴{i}" for i in range(200)]
+
+    return [
+        {
+            "id": i,
+            "lat": 35.0,
+            "lng": 139.0,
+            "keywords": rng.sample(mapped, rng.randint(3, 15)) + rng.sample(extra, rng.randint(0, 5)),
+        }
+        for i in range(count)
+    ]
+
+
+def time_backend(run: Callable[[], np.ndarray], repeat: int) -> float:
+    """1回あたりの平均実行時間（ミリ秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="キーワードマッチのベンチマーク")
+    parser.add_argument("--facilities", type=int, default=5000, help="施設数")
+    parser.add_argument("--queries", type=int, default=200, help="クエリ数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    table = FacilityTable(build_facilities(args.facilities, args.seed))
+    positions = np.arange(len(table))
+
+    queries = []
+    for _ in range(args.queries):
+        vibes = rng.sample(list(VIBE_KEYWORDS), 3)
+        sensations = rng.sample(list(SENSATION_KEYWORDS), rng.randint(1, 4))
+        queries.append(get_vibe_keyword_set(vibes))
+        queries.append(get_sensation_keyword_set(sensations))
+
+    # 結果が一致することを確認
+    for keywords in queries:
+        expected = table.count_matches(positions, keywords, "list")
+        actual = table.count_matches(positions, keywords, "bitset")
+        assert np.array_equal(expected, actual), "bitsetとlistの結果が一致しません"
+
+    results = {}
+    for backend in ("list", "bitset"):
+        results[backend] = time_backend(
+            lambda: [table.count_matches(positions, keywords, backend) for keywords in queries],
+            repeat=3,
+        ) / len(queries)
+
+    print("=" * 50)
+    print("YURIFT キーワードマッチ ベンチマーク")
+    print("=" * 50)
+    print(f"施設数: {args.facilities} / クエリ数: {len(queries)}")
+    print(f"マスク幅: {table.mask_words} x uint64")
+    print("")
+    for backend, elapsed in results.items():
+        print(f"{backend:>7}: {elapsed:.3f} ms/クエリ")
+    print(f"\n高速化: {results['list'] / results['bitset']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
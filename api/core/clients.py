@@ -0,0 +1,78 @@
+"""
+外部サービスの非同期クライアント
+接続プールはプロセス内で共有し、サイズ・タイムアウトはSettingsから決める
+"""
+import httpx
+from openai import AsyncOpenAI
+from postgrest import AsyncPostgrestClient
+from redis.asyncio import Redis
+from api.core.config import settings
+
+
+def http_limits() -> httpx.Limits:
+    """HTTP接続プールのサイズ"""
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    )
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """接続プールのサイズを指定できるPostgRESTクライアント"""
+
+    def create_session(self, base_url, headers, timeout, verify=True) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            follow_redirects=True,
+            http2=True,
+            limits=http_limits(),
+        )
+
+
+def create_postgrest_client() -> AsyncPostgrestClient:
+    """
+    Supabase（PostgREST）の非同期クライアントを作成
+
+    Returns:
+        AsyncPostgrestClient
+    """
+    key = settings.SUPABASE_SERVICE_ROLE_KEY
+    return PooledPostgrestClient(
+        f"{settings.SUPABASE_URL}/rest/v1",
+        headers={"apikey": key, "Authorization": f"Bearer {key}"},
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+    )
+
+
+def create_openai_client() -> AsyncOpenAI:
+    """
+    OpenAIの非同期クライアントを作成
+
+    Returns:
+        AsyncOpenAI
+    """
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        timeout=settings.OPENAI_TIMEOUT_SECONDS,
+        http_client=httpx.AsyncClient(limits=http_limits()),
+    )
+
+
+def create_redis_client() -> Redis:
+    """
+    Redisの非同期クライアントを作成
+
+    Returns:
+        redis.asyncio.Redis
+    """
+    return Redis.from_url(
+        settings.UPSTASH_REDIS_REST_URL,
+        decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_READ_TIMEOUT_SECONDS,
+        health_check_interval=30,
+    )
@@ -25,15 +25,77 @@ class Settings(BaseSettings):
     UPSTASH_REDIS_REST_URL: str
     UPSTASH_REDIS_REST_TOKEN: str
 
+    # 接続プール設定（Supabase / OpenAI / Redis 共通のクライアントを共有）
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    REDIS_MAX_CONNECTIONS: int = 10
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 0.5
+    REDIS_READ_TIMEOUT_SECONDS: float = 0.5
+
     # CORS許可オリジン（環境変数から読み込み、カンマ区切り）
     ALLOWED_ORIGINS: str = "http://localhost:3000,https://yurift.vercel.app"
 
     # Rate Limiting設定
     RATE_LIMIT_MAX_REQUESTS: int = 5  # 5回/日
     RATE_LIMIT_WINDOW_SECONDS: int = 86400  # 24時間
+    RATE_LIMIT_PRECISION_MS: int = 1  # ウィンドウの時刻精度（ミリ秒）
+    RATE_LIMIT_LOCAL_FILTER_ENABLED: bool = True  # プロセス内トークンバケットで前段フィルタ
+    RATE_LIMIT_LOCAL_MAX_ENTRIES: int = 10000  # ローカルで状態を保持するIP数の上限
+    RATE_LIMIT_REJECT_CACHE_ENABLED: bool = True  # 拒否したIPはリセットまでローカルで拒否
+    RATE_LIMIT_LOCAL_TRUST_SECONDS: int = 60  # ローカルの拒否をRedisに確かめずに信頼する時間（リセットの反映猶予）
+    RATE_LIMIT_BREAKER_FAILURE_THRESHOLD: int = 3  # 連続失敗でRedisを切り離す回数
+    RATE_LIMIT_BREAKER_COOLDOWN_SECONDS: float = 30.0  # 切り離している時間
 
     # キャッシュ設定
-    CACHE_TTL_DAYS: int = 7  # 7日間
+    CACHE_TTL_DAYS: int = 7  # 7日間（ハードTTL: 過ぎたら返さない）
+    CACHE_SOFT_TTL_DAYS: float = 5.0  # ソフトTTL: 過ぎたら古い結果を返しつつバックグラウンドで再計算
+    CACHE_L1_MAX_ENTRIES: int = 1024  # プロセス内キャッシュの上限件数
+    CACHE_L1_TTL_SECONDS: int = 300  # プロセス内キャッシュのTTL（5分）
+    CACHE_WRITE_QUEUE_SIZE: int = 1000  # 書き込みキューの上限（超えたら破棄）
+    CACHE_WRITE_BATCH_SIZE: int = 50  # 1回のupsertでまとめる件数
+    CACHE_WRITE_LINGER_SECONDS: float = 0.5  # バッチを埋めるための最大待ち時間
+    CACHE_PAYLOAD_FORMAT: str = "compact"  # compact（ID・距離・スコア・キャッチフレーズのみ）| full
+    CACHE_EMPTY_AREA_TTL_SECONDS: int = 600  # 施設なしエリアの記録のTTL（10分、0で無効）
+    CACHE_EMPTY_AREA_MAX_ENTRIES: int = 10000  # 施設なしエリアの記録の上限件数
+    CACHE_SWEEP_ENABLED: bool = True  # 期限切れキャッシュをバックグラウンドで定期削除
+    CACHE_SWEEP_INTERVAL_SECONDS: int = 3600  # 削除の間隔（1時間）
+    CACHE_SWEEP_BATCH_SIZE: int = 500  # 1回の削除で消す最大件数
+    CACHE_SWEEP_PAUSE_SECONDS: float = 0.5  # バッチ間の待機時間
+    CACHE_SWEEP_MAX_BATCHES: int = 100  # 1回の掃除での最大バッチ数（0: 無制限）
+
+    # キャッシュキーの位置量子化（geohash | round2）
+    # data/scripts/measure_cache_key_stability.py で精度ごとの結果の安定性を計測して決める
+    CACHE_KEY_QUANTIZATION: str = "round2"
+    CACHE_GEOHASH_PRECISION: int = 5  # 約4.9km × 4.0km（施設がまばらな地域）
+    CACHE_GEOHASH_DENSE_PRECISION: int = 6  # 約0.6km × 1.0km（施設が密集した地域）
+    CACHE_GEOHASH_DENSE_THRESHOLD: int = 30  # この施設数以上なら密集とみなす
+    CACHE_GEOHASH_DENSITY_RADIUS_KM: float = 10.0  # 密度を数える半径
+
+    # 施設インデックス設定（onsen_masterをメモリ上に保持）
+    FACILITY_INDEX_ENABLED: bool = True
+    FACILITY_INDEX_REFRESH_SECONDS: int = 300  # 5分ごとに更新チェック
+    FACILITY_INDEX_GRID_CELL_KM: float = 10.0  # グリッドのセルサイズ
+
+    # キャッチフレーズキャッシュ設定（施設 × 気分）
+    CATCHPHRASE_CACHE_MAX_ENTRIES: int = 10000
+    CATCHPHRASE_CACHE_TTL_SECONDS: int = 604800  # 7日間
+
+    # 事前生成キャッチフレーズ（catchphrase_precomputedテーブルをメモリ上に保持）
+    CATCHPHRASE_PRECOMPUTED_ENABLED: bool = True
+    CATCHPHRASE_PRECOMPUTED_REFRESH_SECONDS: int = 600  # 10分ごとに更新チェック
+
+    # キャッチフレーズ生成の締め切り（超えたら施設キーワードの代替で応答、0で無効）
+    CATCHPHRASE_DEADLINE_MS: int = 1500
+
+    # キャッチフレーズ生成のマイクロバッチ（同時リクエストをまとめて1回で生成）
+    CATCHPHRASE_BATCHING_ENABLED: bool = False
+    CATCHPHRASE_BATCH_WINDOW_MS: int = 30  # 集める時間窓
+    CATCHPHRASE_BATCH_MAX_FACILITIES: int = 12  # 1回の最大施設数
+
+    # 検索エンジン設定
+    KEYWORD_MATCH_BACKEND: str = "bitset"  # bitset | list
 
     # セキュリティ設定
     API_DOCS_ENABLED: bool = True  # 本番環境ではfalseに
@@ -64,6 +126,54 @@ class Settings(BaseSettings):
             raise ValueError("Upstash URL must start with https://")
         return v
 
+    @field_validator("RATE_LIMIT_PRECISION_MS")
+    @classmethod
+    def validate_rate_limit_precision(cls, v: int) -> int:
+        """レート制限の時刻精度のバリデーション"""
+        if v < 1 or v > 1000:
+            raise ValueError("RATE_LIMIT_PRECISION_MS must be between 1 and 1000")
+        return v
+
+    @field_validator("CACHE_KEY_QUANTIZATION")
+    @classmethod
+    def validate_cache_key_quantization(cls, v: str) -> str:
+        """キャッシュキーの位置量子化方式のバリデーション"""
+        if v not in ("geohash", "round2"):
+            raise ValueError("CACHE_KEY_QUANTIZATION must be 'geohash' or 'round2'")
+        return v
+
+    @field_validator("CACHE_PAYLOAD_FORMAT")
+    @classmethod
+    def validate_cache_payload_format(cls, v: str) -> str:
+        """キャッシュの保存形式のバリデーション"""
+        if v not in ("compact", "full"):
+            raise ValueError("CACHE_PAYLOAD_FORMAT must be 'compact' or 'full'")
+        return v
+
+    @field_validator("CACHE_GEOHASH_PRECISION", "CACHE_GEOHASH_DENSE_PRECISION")
+    @classmethod
+    def validate_geohash_precision(cls, v: int) -> int:
+        """Geohash精度のバリデーション"""
+        if v < 1 or v > 12:
+            raise ValueError("Geohash precision must be between 1 and 12")
+        return v
+
+    @field_validator("CACHE_SWEEP_BATCH_SIZE")
+    @classmethod
+    def validate_cache_sweep_batch_size(cls, v: int) -> int:
+        """期限切れキャッシュ削除のバッチサイズのバリデーション"""
+        if v < 1:
+            raise ValueError("CACHE_SWEEP_BATCH_SIZE must be at least 1")
+        return v
+
+    @field_validator("KEYWORD_MATCH_BACKEND")
+    @classmethod
+    def validate_keyword_match_backend(cls, v: str) -> str:
+        """キーワードマッチバックエンドのバリデーション"""
+        if v not in ("bitset", "list"):
+            raise ValueError("KEYWORD_MATCH_BACKEND must be 'bitset' or 'list'")
+        return v
+
     def get_allowed_origins(self) -> List[str]:
         """CORS許可オリジンをリストで取得"""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
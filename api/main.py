@@ -7,6 +7,15 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from api.core.config import settings
+from api.services.facility_index import facility_index
+from api.services.cache_service import cache_service
+from api.services.cache_sweeper import cache_sweeper
+from api.services.supabase_client import supabase_service
+from api.services.openai_service import openai_service
+from api.services.catchphrase_service import catchphrase_service
+from api.services.catchphrase_store import precomputed_catchphrases
+from api.services.rate_limiter import rate_limiter
+from api.routes.drift import drift_single_flight
 import time
 
 
@@ -84,6 +93,27 @@ async def global_exception_handler(request: Request, exc: Exception):
         )
 
 
+@app.on_event("startup")
+async def startup():
+    """起動時処理（施設インデックス・事前生成キャッチフレーズのロード、キャッシュ書き込み・削除タスクの開始）"""
+    await facility_index.start()
+    await precomputed_catchphrases.start()
+    cache_service.start()
+    cache_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """終了時処理（バックグラウンドタスクの停止・接続プールのクローズ）"""
+    await facility_index.stop()
+    await precomputed_catchphrases.stop()
+    await cache_sweeper.stop()
+    await cache_service.stop()
+    await openai_service.close()
+    await rate_limiter.close()
+    await supabase_service.close()
+
+
 @app.get("/")
 async def root():
     """
@@ -96,7 +126,9 @@ async def root():
         "environment": settings.ENV,
         "endpoints": {
             "drift_search": "/api/drift",
+            "drift_search_stream": "/api/drift/stream",
             "health": "/api/health",
+            "metrics": "/api/metrics",
             "docs": "/api/docs" if settings.API_DOCS_ENABLED else None,
         },
     }
@@ -117,10 +149,27 @@ async def health_check():
                 "supabase": "ok",
                 "redis": "ok",
             },
+            "facility_index": facility_index.stats(),
         }
     )
 
 
+@app.get("/api/metrics")
+async def metrics():
+    """
+    インプロセスのメトリクス（キャッシュ・インデックスの統計）
+    """
+    return {
+        "facility_index": facility_index.stats(),
+        "cache": cache_service.stats(),
+        "cache_sweeper": cache_sweeper.stats(),
+        "single_flight": drift_single_flight.stats(),
+        "catchphrase": catchphrase_service.stats(),
+        "openai": openai_service.stats(),
+        "rate_limiter": rate_limiter.stats(),
+    }
+
+
 # ルーター追加
 from api.routes import drift
 
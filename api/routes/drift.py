@@ -1,16 +1,25 @@
 """
 Drift検索APIエンドポイント
 """
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, MutableMapping, Optional
 from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from api.models.request import DriftRequest
 from api.models.response import DriftResponse, OnsenFacility, ErrorResponse
 from api.services.search_engine import search_engine
-from api.services.openai_service import openai_service
-from api.services.cache_service import cache_service
+from api.services.catchphrase_service import catchphrase_service, fallback_catchphrase
+from api.services.openai_service import DEFAULT_CATCHPHRASE
+from api.services.cache_service import cache_service, CachedResult
 from api.services.rate_limiter import rate_limiter
+from api.utils.single_flight import SingleFlight
 
 router = APIRouter()
 
+# 同一キャッシュキーの同時キャッシュミスを1回の検索にまとめる
+drift_single_flight = SingleFlight()
+
 
 @router.post(
     "/drift",
@@ -37,108 +46,348 @@ async def drift_search(drift_request: DriftRequest, request: Request, response:
         HTTPException: 検索エラー時
     """
     try:
-        # 1. レート制限チェック
-        client_ip = request.client.host if request.client else "unknown"
-        allowed, remaining, reset_seconds = await rate_limiter.check_rate_limit(client_ip)
+        # 1. 検索パラメータ準備
+        search_params = _build_search_params(drift_request)
 
-        # レート制限ヘッダー設定
-        response.headers["X-RateLimit-Limit"] = str(rate_limiter.max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_seconds)
+        # 2. レート制限チェックとキャッシュチェック
+        cached = await _check_rate_limit_and_cache(search_params, request, response.headers)
 
-        if not allowed:
-            raise HTTPException(
-                status_code=429,
-                detail=f"レート制限に達しました。{reset_seconds}秒後に再試行してください。",
-            )
+        # 3. キャッシュヒット（ソフトTTL超過ならそのまま返してバックグラウンドで再計算）
+        if cached:
+            if cached.stale:
+                _refresh_in_background(drift_request, search_params)
+            # 保存時のcachedフラグは上書き
+            return DriftResponse(**{**cached.result, "cached": True})
+
+        # 4-8. 検索・キャッチフレーズ生成・キャッシュ保存（同一キーの同時リクエストは合流）
+        result, coalesced = await drift_single_flight.do(
+            cache_service.cache_key(search_params),
+            lambda: run_drift_search(drift_request, search_params),
+        )
+
+        if coalesced:
+            # 合流したリクエストには自分の検索パラメータを返す
+            return result.copy(update={"search_params": search_params})
+
+        return result
+
+    except HTTPException:
+        # HTTPExceptionはそのまま再送出
+        raise
+
+    except Exception as e:
+        raise _internal_error(e)
 
-        # 2. 検索パラメータ準備
-        search_params = {
-            "vibes": drift_request.vibes,
-            "sensations": drift_request.sensations,
-            "location": {
-                "lat": drift_request.location.lat,
-                "lng": drift_request.location.lng,
-            },
-        }
 
-        # 3. キャッシュチェック
-        cached_result = await cache_service.get(search_params)
+@router.post(
+    "/drift/stream",
+    summary="Drift検索（ストリーミング）",
+    description="検索結果（3件）を先に返し、キャッチフレーズは生成でき次第NDJSONで1件ずつ返す",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def drift_search_stream(drift_request: DriftRequest, request: Request):
+    """
+    Drift検索エンドポイント（ストリーミング版）
+
+    1行1イベントのNDJSONで返す:
+    - {"type": "facilities", ...}: 施設3件（距離・スコア付き）。
+      キャッチフレーズ生成前は施設キーワードの代替キャッチフレーズが入る
+    - {"type": "catchphrase", "index", "facility_id", "catchphrase"}: 生成できた順に1件ずつ
+    - {"type": "done", "cached", "complete"}: 終了
+
+    キャッシュヒット時はキャッチフレーズ確定済みのfacilitiesとdoneを一度に返す
+
+    Args:
+        drift_request: Drift検索リクエスト
+        request: FastAPIリクエスト（IPアドレス取得用）
+
+    Returns:
+        StreamingResponse: NDJSONストリーム（レート制限ヘッダー付き）
+
+    Raises:
+        HTTPException: 検索エラー時（ストリーム開始前に判定）
+    """
+    try:
+        search_params = _build_search_params(drift_request)
 
-        if cached_result:
-            # キャッシュヒット
-            return DriftResponse(**cached_result, cached=True)
+        # レート制限・キャッシュ・施設検索はストリーム開始前に判定（エラーは通常のHTTPエラー）
+        headers: Dict[str, str] = {}
+        cached = await _check_rate_limit_and_cache(search_params, request, headers)
 
-        # 4. ルールベース検索実行
-        facilities = await search_engine.search(
-            vibes=drift_request.vibes,
-            sensations=drift_request.sensations,
-            user_lat=drift_request.location.lat,
-            user_lng=drift_request.location.lng,
-            max_distance_km=50.0,
+        if cached:
+            if cached.stale:
+                _refresh_in_background(drift_request, search_params)
+            events = _stream_cached(cached.result)
+        else:
+            top_3_facilities = await _search_top_facilities(drift_request)
+            events = _stream_drift(drift_request, search_params, top_3_facilities)
+
+        return StreamingResponse(events, media_type="application/x-ndjson", headers=headers)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise _internal_error(e)
+
+
+def _build_search_params(drift_request: DriftRequest) -> dict:
+    """検索パラメータ（キャッシュキーの元）を構築"""
+    return {
+        "vibes": drift_request.vibes,
+        "sensations": drift_request.sensations,
+        "location": {
+            "lat": drift_request.location.lat,
+            "lng": drift_request.location.lng,
+        },
+    }
+
+
+async def _check_rate_limit_and_cache(
+    search_params: dict, request: Request, headers: MutableMapping[str, str]
+) -> Optional[CachedResult]:
+    """
+    レート制限チェックとキャッシュチェックを並行実行（Redis / Supabaseの往復を重ねる）
+
+    Args:
+        search_params: 検索パラメータ
+        request: FastAPIリクエスト（IPアドレス取得用）
+        headers: レート制限ヘッダーの設定先
+
+    Returns:
+        キャッシュ結果 または None
+
+    Raises:
+        HTTPException: レート制限超過時（429）、施設なしエリアとして記録済みの場合（404）
+    """
+    client_ip = request.client.host if request.client else "unknown"
+
+    # 施設なしエリアはキャッシュ（L2）も検索もしない
+    empty_area = cache_service.is_empty_area(search_params)
+    if empty_area:
+        allowed, remaining, reset_seconds = await rate_limiter.check_rate_limit(client_ip)
+        cached = None
+    else:
+        (allowed, remaining, reset_seconds), cached = await asyncio.gather(
+            rate_limiter.check_rate_limit(client_ip),
+            cache_service.get(search_params),
         )
 
-        # 5. 上位3件を取得
-        top_3_facilities = facilities[:3]
+    # レート制限ヘッダー設定
+    headers["X-RateLimit-Limit"] = str(rate_limiter.max_requests)
+    headers["X-RateLimit-Remaining"] = str(remaining)
+    headers["X-RateLimit-Reset"] = str(reset_seconds)
 
-        if len(top_3_facilities) == 0:
-            raise HTTPException(
-                status_code=404,
-                detail="近くに温泉施設が見つかりませんでした。別の場所で試してください。",
-            )
+    # レート制限はキャッシュ結果を返す前に判定（429にもレート制限ヘッダーを付ける）
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"レート制限に達しました。{reset_seconds}秒後に再試行してください。",
+            headers={**headers, "Retry-After": str(reset_seconds)},
+        )
 
-        # 6. OpenAIでキャッチフレーズ生成（3施設まとめて）
-        catchphrases = await openai_service.generate_catchphrases(
-            facilities=top_3_facilities,
-            vibes=drift_request.vibes,
-            sensations=drift_request.sensations,
+    if empty_area:
+        raise _not_found_error()
+
+    return cached
+
+
+def _refresh_in_background(drift_request: DriftRequest, search_params: dict) -> None:
+    """
+    ソフトTTLを過ぎたキャッシュをバックグラウンドで再計算
+
+    同じキーの再計算・キャッシュミス処理が実行中なら新たに開始しない（合流キーを共有）
+    """
+    drift_single_flight.start(
+        cache_service.cache_key(search_params),
+        lambda: run_drift_search(drift_request, search_params),
+    )
+
+
+def _not_found_error() -> HTTPException:
+    """近くに施設がない場合の404"""
+    return HTTPException(
+        status_code=404,
+        detail="近くに温泉施設が見つかりませんでした。別の場所で試してください。",
+    )
+
+
+def _internal_error(e: Exception) -> HTTPException:
+    """その他のエラーを500として返す"""
+    from api.core.config import settings
+
+    if settings.is_production():
+        # 本番環境では詳細を隠す
+        return HTTPException(
+            status_code=500,
+            detail="検索中にエラーが発生しました。しばらく時間をおいて再度お試しください。",
+        )
+    else:
+        # 開発環境では詳細を表示
+        return HTTPException(
+            status_code=500,
+            detail=f"検索中にエラーが発生しました: {str(e)}",
         )
 
-        # 7. レスポンス構築
-        result_facilities = []
-        for i, facility in enumerate(top_3_facilities):
-            result_facilities.append(
-                OnsenFacility(
-                    id=facility["id"],
-                    name=facility["name"],
-                    address=facility["address"],
-                    lat=facility["lat"],
-                    lng=facility["lng"],
-                    price=facility["price"],
-                    distance_km=facility["distance_km"],
-                    catchphrase=catchphrases[i] if i < len(catchphrases) else "温泉を楽しむ",
-                    score=facility["score"],
-                )
+
+async def _search_top_facilities(drift_request: DriftRequest) -> List[Dict[str, Any]]:
+    """
+    ルールベース検索を実行して上位3件を取得
+
+    0件の場合、セル内のどこからでも0件なら施設なしエリアとして記録する（次回から検索しない）
+
+    Raises:
+        HTTPException: 施設が見つからない場合
+    """
+    facilities = await search_engine.search(
+        vibes=drift_request.vibes,
+        sensations=drift_request.sensations,
+        user_lat=drift_request.location.lat,
+        user_lng=drift_request.location.lng,
+        max_distance_km=50.0,
+    )
+
+    top_3_facilities = facilities[:3]
+
+    if len(top_3_facilities) == 0:
+        cache_service.set_empty_area(_build_search_params(drift_request), max_distance_km=50.0)
+        raise _not_found_error()
+
+    return top_3_facilities
+
+
+def _to_onsen_facility(facility: Dict[str, Any], catchphrase: str) -> OnsenFacility:
+    """検索結果の施設をレスポンス用モデルに変換"""
+    return OnsenFacility(
+        id=facility["id"],
+        name=facility["name"],
+        address=facility["address"],
+        lat=facility["lat"],
+        lng=facility["lng"],
+        price=facility["price"],
+        distance_km=facility["distance_km"],
+        catchphrase=catchphrase,
+        score=facility["score"],
+    )
+
+
+def _ndjson(event: Dict[str, Any]) -> str:
+    """イベントをNDJSONの1行にする"""
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+async def _stream_cached(cached_result: dict) -> AsyncIterator[str]:
+    """キャッシュヒット時: 確定済みの結果を一度に返す"""
+    yield _ndjson(
+        {
+            "type": "facilities",
+            "facilities": cached_result["facilities"],
+            "search_params": cached_result["search_params"],
+            "cached": True,
+        }
+    )
+    yield _ndjson({"type": "done", "cached": True, "complete": True})
+
+
+async def _stream_drift(
+    drift_request: DriftRequest, search_params: dict, top_3_facilities: List[Dict[str, Any]]
+) -> AsyncIterator[str]:
+    """
+    キャッシュミス時: 施設を先に返し、キャッチフレーズを生成でき次第返す
+
+    全施設のキャッチフレーズが揃ったらキャッシュに保存する
+    （生成が途中で失敗した場合は代替キャッチフレーズのまま終了し、保存しない）
+    """
+    vibes, sensations = drift_request.vibes, drift_request.sensations
+
+    result_facilities = [
+        _to_onsen_facility(facility, fallback_catchphrase(facility, vibes, sensations))
+        for facility in top_3_facilities
+    ]
+    yield _ndjson(
+        {
+            "type": "facilities",
+            "facilities": [facility.dict() for facility in result_facilities],
+            "search_params": search_params,
+            "cached": False,
+        }
+    )
+
+    complete = True
+    try:
+        async for index, catchphrase in catchphrase_service.stream_catchphrases(
+            facilities=top_3_facilities,
+            vibes=vibes,
+            sensations=sensations,
+        ):
+            result_facilities[index] = result_facilities[index].copy(update={"catchphrase": catchphrase})
+            yield _ndjson(
+                {
+                    "type": "catchphrase",
+                    "index": index,
+                    "facility_id": result_facilities[index].id,
+                    "catchphrase": catchphrase,
+                }
             )
+    except Exception as e:
+        complete = False
+        print(f"⚠️  キャッチフレーズのストリーミング生成エラー: {str(e)}")
 
+    if complete:
         result = DriftResponse(
             facilities=result_facilities,
             cached=False,
             search_params=search_params,
         )
+        cache_service.enqueue_set(search_params, result.dict())
 
-        # 8. キャッシュ保存
-        await cache_service.set(search_params, result.dict())
+    yield _ndjson({"type": "done", "cached": False, "complete": complete})
 
-        return result
 
-    except HTTPException:
-        # HTTPExceptionはそのまま再送出
-        raise
+async def run_drift_search(drift_request: DriftRequest, search_params: dict) -> DriftResponse:
+    """
+    キャッシュミス時の検索処理（検索 → キャッチフレーズ生成 → キャッシュ保存）
 
-    except Exception as e:
-        # その他のエラーは500として返す
-        from api.core.config import settings
-
-        if settings.is_production():
-            # 本番環境では詳細を隠す
-            raise HTTPException(
-                status_code=500,
-                detail="検索中にエラーが発生しました。しばらく時間をおいて再度お試しください。",
-            )
-        else:
-            # 開発環境では詳細を表示
-            raise HTTPException(
-                status_code=500,
-                detail=f"検索中にエラーが発生しました: {str(e)}",
-            )
+    キャッシュの事前投入（data/scripts/prewarm_cache.py）からも呼ばれる
+
+    Args:
+        drift_request: Drift検索リクエスト
+        search_params: 検索パラメータ
+
+    Returns:
+        DriftResponse: 検索結果（3施設）
+
+    Raises:
+        HTTPException: 施設が見つからない場合
+    """
+    # 4-5. ルールベース検索実行・上位3件を取得
+    top_3_facilities = await _search_top_facilities(drift_request)
+
+    # 6. キャッチフレーズ取得（施設×気分のキャッシュにない施設だけOpenAIでまとめて生成）
+    #    締め切りを超えた場合は施設キーワードの代替キャッチフレーズ（complete=False）
+    catchphrases, complete = await catchphrase_service.get_catchphrases(
+        facilities=top_3_facilities,
+        vibes=drift_request.vibes,
+        sensations=drift_request.sensations,
+    )
+
+    # 7. レスポンス構築
+    result_facilities = [
+        _to_onsen_facility(
+            facility, catchphrases[i] if i < len(catchphrases) else DEFAULT_CATCHPHRASE
+        )
+        for i, facility in enumerate(top_3_facilities)
+    ]
+
+    result = DriftResponse(
+        facilities=result_facilities,
+        cached=False,
+        search_params=search_params,
+    )
+
+    # 8. キャッシュ保存（L2への書き込みはバックグラウンド、レスポンスは待たない）
+    #    代替キャッチフレーズの結果は保存しない（次回は生成済みのキャッチフレーズで応答）
+    if complete:
+        cache_service.enqueue_set(search_params, result.dict())
+
+    return result
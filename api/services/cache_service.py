@@ -1,13 +1,39 @@
 """
 キャッシュサービス
-Supabaseのsearch_cacheテーブルを使用（TTL: 7日間）
+L1: プロセス内LRUキャッシュ / L2: Supabaseのsearch_cacheテーブル（TTL: 7日間）
 """
 import hashlib
 import json
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
-from supabase import create_client, Client
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from postgrest import AsyncPostgrestClient
+from postgrest.types import ReturnMethod
 from api.core.config import settings
+from api.services.distance_calculator import haversine_distance
+from api.services.facility_index import facility_index
+from api.services.location_quantizer import location_quantizer
+from api.services.search_engine import distance_score
+from api.services.supabase_client import supabase_service
+from api.utils.batch_writer import BatchWriter
+from api.utils.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """
+    キャッシュされた検索結果
+
+    - result: 検索結果
+    - stale: ソフトTTLを過ぎている（そのまま返してよいが、バックグラウンドで再計算する）
+    """
+
+    result: Dict[str, Any]
+    stale: bool
+
+
+# コンパクト形式の版（形式を変えたら上げる）
+COMPACT_PAYLOAD_VERSION = 1
 
 
 class CacheService:
@@ -15,22 +41,55 @@ class CacheService:
     検索結果キャッシュサービス
 
     - キャッシュキー: search_paramsのハッシュ値
-    - TTL: 7日間（CACHE_TTL_DAYS設定）
-    - 位置情報の丸め: 緯度経度を小数点第2位まで（約1.1km範囲）
+    - TTL: 7日間（CACHE_TTL_DAYS設定、ハードTTL）
+      ソフトTTL（CACHE_SOFT_TTL_DAYS）を過ぎた結果はstaleとして返し、呼び出し側が再計算する
+    - 位置情報の丸め: 小数点第2位（約1.1km）またはGeohashセル（CACHE_KEY_QUANTIZATION設定）
+    - 2段構成: L1（プロセス内LRU）→ L2（Supabase）
+      L1ミス時のみL2を参照し、L2ヒットはL1に格納する
+    - 書き込み: enqueue_setでL1に即時反映し、L2へはバックグラウンドでまとめてupsert
+    - L2の保存形式（CACHE_PAYLOAD_FORMAT=compact）: 施設ID・距離・スコア・キャッチフレーズのみ
+      {"v": 1, "f": [[id, distance_km, score, catchphrase], ...]}
+      読み込み時に施設名・住所・料金などを施設インデックスから復元する
+    - 同じセルの別の位置からのヒットでは、距離・スコアをリクエストの位置で計算し直す
+    - 施設なしエリア: 検索結果が0件だった位置をセル単位で短時間記録する（プロセス内のみ）
+      Vibe/Sensationに関係なく0件のため、キーは量子化した位置だけ
+      セル内のどの位置からでも0件になる場合（中心から半径 + 中心〜角の距離に施設がない）だけ記録する
     """
 
     def __init__(self):
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY,
-        )
+        # 接続プールはSupabaseServiceと共有
+        self.client: AsyncPostgrestClient = supabase_service.client
+        self.quantizer = location_quantizer
+        self.facilities = facility_index
+        self.payload_format = settings.CACHE_PAYLOAD_FORMAT
         self.ttl_days = settings.CACHE_TTL_DAYS
+        self.soft_ttl = timedelta(days=min(settings.CACHE_SOFT_TTL_DAYS, self.ttl_days))
+        self.l1 = TTLCache(
+            max_entries=settings.CACHE_L1_MAX_ENTRIES,
+            ttl_seconds=settings.CACHE_L1_TTL_SECONDS,
+        )
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.stale_hits = 0
+        self.rehydrate_misses = 0
+        self.empty_areas = TTLCache(
+            max_entries=settings.CACHE_EMPTY_AREA_MAX_ENTRIES,
+            ttl_seconds=settings.CACHE_EMPTY_AREA_TTL_SECONDS,
+        )
+        self._empty_areas_loaded_at: Optional[float] = None
+        self.writer = BatchWriter(
+            self._upsert_rows,
+            max_queue=settings.CACHE_WRITE_QUEUE_SIZE,
+            batch_size=settings.CACHE_WRITE_BATCH_SIZE,
+            linger_seconds=settings.CACHE_WRITE_LINGER_SECONDS,
+            name="キャッシュ書き込み",
+        )
 
     def _generate_cache_key(self, search_params: Dict[str, Any]) -> str:
         """
         検索パラメータからキャッシュキーを生成
 
-        位置情報は小数点第2位まで丸める（キャッシュヒット率向上）
+        位置情報はセルに丸める（近いユーザー同士でキャッシュを共有）
 
         Args:
             search_params: 検索パラメータ
@@ -42,10 +101,9 @@ class CacheService:
         rounded_params = {
             "vibes": sorted(search_params["vibes"]),  # ソートして順序を統一
             "sensations": sorted(search_params["sensations"]),
-            "location": {
-                "lat": round(search_params["location"]["lat"], 2),
-                "lng": round(search_params["location"]["lng"], 2),
-            },
+            "location": self.quantizer.quantize(
+                search_params["location"]["lat"], search_params["location"]["lng"]
+            ),
         }
 
         # JSON文字列化してハッシュ
@@ -54,7 +112,81 @@ class CacheService:
 
         return cache_key
 
-    async def get(self, search_params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def cache_key(self, search_params: Dict[str, Any]) -> str:
+        """
+        検索パラメータに対応するキャッシュキー（リクエスト合流などに使用）
+
+        Args:
+            search_params: 検索パラメータ
+
+        Returns:
+            キャッシュキー
+        """
+        return self._generate_cache_key(search_params)
+
+    def _empty_area_key(self, search_params: Dict[str, Any]) -> str:
+        """施設なしエリアのキー（量子化した位置のみ）"""
+        location = self.quantizer.quantize(
+            search_params["location"]["lat"], search_params["location"]["lng"]
+        )
+        return json.dumps(location, sort_keys=True)
+
+    def _sync_empty_areas(self) -> None:
+        """施設インデックスが再ロードされたら記録を破棄（施設が追加された可能性）"""
+        if self.facilities.loaded_at != self._empty_areas_loaded_at:
+            self.empty_areas.clear()
+            self._empty_areas_loaded_at = self.facilities.loaded_at
+
+    def is_empty_area(self, search_params: Dict[str, Any]) -> bool:
+        """
+        施設なしエリアとして記録済みか（Supabase・検索エンジンを呼ばずに判定）
+
+        Args:
+            search_params: 検索パラメータ
+
+        Returns:
+            記録済みならTrue
+        """
+        self._sync_empty_areas()
+        return self.empty_areas.get(self._empty_area_key(search_params)) is not None
+
+    def set_empty_area(self, search_params: Dict[str, Any], max_distance_km: float) -> bool:
+        """
+        検索結果が0件だった位置を施設なしエリアとして記録
+
+        記録はセル単位のため、セル内のどの位置から検索しても0件になる場合だけ記録する
+        （セルの中心から 半径 + 中心〜角の距離 以内に施設がない）。
+        施設インデックス未ロード時は確かめられないため記録しない
+
+        Args:
+            search_params: 検索パラメータ
+            max_distance_km: 検索半径（km）
+
+        Returns:
+            記録したらTrue
+        """
+        if not self.facilities.is_ready:
+            return False
+
+        lat_min, lat_max, lng_min, lng_max = self.quantizer.cell_bounds(
+            search_params["location"]["lat"], search_params["location"]["lng"]
+        )
+        center_lat, center_lng = (lat_min + lat_max) / 2, (lng_min + lng_max) / 2
+        reach_km = max(
+            haversine_distance(center_lat, center_lng, corner_lat, corner_lng)
+            for corner_lat in (lat_min, lat_max)
+            for corner_lng in (lng_min, lng_max)
+        )
+        # 距離は小数点第2位に丸めて判定するため0.01km余裕を持たせる
+        radius_km = max_distance_km + reach_km + 0.01
+        if self.facilities.count_nearby(center_lat, center_lng, radius_km) > 0:
+            return False
+
+        self._sync_empty_areas()
+        self.empty_areas.set(self._empty_area_key(search_params), True)
+        return True
+
+    async def get(self, search_params: Dict[str, Any]) -> Optional[CachedResult]:
         """
         キャッシュから検索結果を取得
 
@@ -62,31 +194,63 @@ class CacheService:
             search_params: 検索パラメータ
 
         Returns:
-            キャッシュされた検索結果 または None
+            キャッシュされた検索結果（ソフトTTL超過ならstale=True） または None
         """
-        try:
-            cache_key = self._generate_cache_key(search_params)
+        cache_key = self._generate_cache_key(search_params)
 
-            # Supabaseから取得
-            response = (
+        # L1（プロセス内）: {"result", "refresh_at"}
+        entry = self.l1.get(cache_key)
+        if entry is None:
+            entry = await self._get_l2(cache_key, search_params)
+        if entry is None:
+            return None
+
+        stale = datetime.now(timezone.utc) >= entry["refresh_at"]
+        if stale:
+            self.stale_hits += 1
+        return CachedResult(result=self._relocate(entry["result"], search_params), stale=stale)
+
+    async def _get_l2(self, cache_key: str, search_params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """L2（Supabase）から取得し、L1に格納"""
+        try:
+            response = await (
                 self.client.table("search_cache")
-                .select("result, expires_at")
+                .select("result, created_at, expires_at")
                 .eq("cache_key", cache_key)
                 .execute()
             )
 
             if not response.data or len(response.data) == 0:
+                self.l2_misses += 1
                 return None
 
             cache_data = response.data[0]
 
             # 有効期限チェック（念のため）
-            expires_at = datetime.fromisoformat(cache_data["expires_at"].replace("Z", "+00:00"))
-            if expires_at < datetime.now(expires_at.tzinfo):
+            expires_at = _parse_timestamp(cache_data["expires_at"])
+            remaining_seconds = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            if remaining_seconds <= 0:
                 # 期限切れ（本来はRLSで除外されるはず）
+                self.l2_misses += 1
                 return None
 
-            return cache_data["result"]
+            result = self._decode_result(cache_data["result"], search_params)
+            if result is None:
+                # 施設インデックスにない施設を含む（未ロード・削除済み）→ 再計算させる
+                self.rehydrate_misses += 1
+                return None
+
+            # ソフトTTLは保存日時から計算（設定変更は既存の行にも反映される）
+            entry = {
+                "result": result,
+                "refresh_at": _parse_timestamp(cache_data["created_at"]) + self.soft_ttl,
+            }
+
+            # L1に格納（L2の有効期限を超えない）
+            self.l2_hits += 1
+            self.l1.set(cache_key, entry, ttl_seconds=remaining_seconds)
+
+            return entry
 
         except Exception as e:
             print(f"⚠️  キャッシュ取得エラー: {str(e)}")
@@ -105,17 +269,13 @@ class CacheService:
         """
         try:
             cache_key = self._generate_cache_key(search_params)
-            expires_at = datetime.utcnow() + timedelta(days=self.ttl_days)
+
+            # L1に保存
+            row = self._build_row(cache_key, search_params, result)
+            self._set_l1(row, result)
 
             # Supabaseに保存（upsert）
-            self.client.table("search_cache").upsert(
-                {
-                    "cache_key": cache_key,
-                    "search_params": search_params,
-                    "result": result,
-                    "expires_at": expires_at.isoformat(),
-                }
-            ).execute()
+            await self.client.table("search_cache").upsert(row).execute()
 
             return True
 
@@ -123,26 +283,235 @@ class CacheService:
             print(f"⚠️  キャッシュ保存エラー: {str(e)}")
             return False
 
-    async def clear_expired(self) -> int:
+    def enqueue_set(self, search_params: Dict[str, Any], result: Dict[str, Any]) -> bool:
         """
-        期限切れキャッシュを削除（メンテナンス用）
+        検索結果をキャッシュに保存（L2への書き込みはバックグラウンド）
+
+        L1には即時反映するため、同じプロセスの後続リクエストはすぐにヒットする
+
+        Args:
+            search_params: 検索パラメータ
+            result: 検索結果
 
         Returns:
-            削除件数
+            書き込みキューに積めたらTrue（満杯で破棄したらFalse）
         """
-        try:
-            now = datetime.utcnow().isoformat()
+        cache_key = self._generate_cache_key(search_params)
+        row = self._build_row(cache_key, search_params, result)
+        self._set_l1(row, result)
+        return self.writer.submit(row)
+
+    def _set_l1(self, row: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """保存する行と同じ鮮度でL1に格納（L1は復元済みの結果を持つ）"""
+        created_at = _parse_timestamp(row["created_at"])
+        self.l1.set(row["cache_key"], {"result": result, "refresh_at": created_at + self.soft_ttl})
+
+    def _relocate(self, result: Dict[str, Any], search_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        キャッシュ済みの結果をリクエストの位置に合わせる
+
+        キャッシュキーは位置をセルに丸めるため、保存した距離は最初にリクエストした位置からのもの。
+        距離を計算し直し、スコアは距離スコアの差分だけ入れ替える（キーワードスコアは位置に依存しない）
+
+        Args:
+            result: キャッシュ済みの検索結果
+            search_params: 今回の検索パラメータ
+
+        Returns:
+            距離・スコア・検索パラメータを今回のリクエストに合わせた検索結果（スコアの降順）
+        """
+        lat = search_params["location"]["lat"]
+        lng = search_params["location"]["lng"]
+
+        facilities = []
+        for facility in result["facilities"]:
+            distance_km = haversine_distance(lat, lng, facility["lat"], facility["lng"])
+            keyword_score = facility["score"] - float(distance_score(facility["distance_km"]))
+            score = round(keyword_score + float(distance_score(distance_km)), 2)
+            facilities.append({**facility, "distance_km": distance_km, "score": score})
+
+        # 並びは検索結果と同じくスコアの降順（同点は元の順序）
+        facilities.sort(key=lambda facility: -facility["score"])
+
+        return {**result, "facilities": facilities, "search_params": search_params}
+
+    def _encode_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        L2に保存する形式に変換
 
-            # 期限切れレコードを削除
-            response = (
-                self.client.table("search_cache").delete().lt("expires_at", now).execute()
+        施設インデックス未ロード時は復元できないため、compact設定でも全項目を保存する
+        """
+        if self.payload_format != "compact" or not self.facilities.is_ready:
+            return result
+
+        return {
+            "v": COMPACT_PAYLOAD_VERSION,
+            "f": [
+                [
+                    facility["id"],
+                    facility["distance_km"],
+                    facility["score"],
+                    facility["catchphrase"],
+                ]
+                for facility in result["facilities"]
+            ],
+        }
+
+    def _decode_result(
+        self, payload: Dict[str, Any], search_params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        L2の保存形式から検索結果を復元
+
+        Args:
+            payload: search_cache.result
+            search_params: 検索パラメータ（compact形式には含まれないためリクエストのものを使う）
+
+        Returns:
+            検索結果 または None（施設インデックスにない施設を含む場合）
+        """
+        # 全項目形式（compact導入前の行・compact無効時）
+        if payload.get("v") != COMPACT_PAYLOAD_VERSION:
+            return payload
+
+        facilities = []
+        for facility_id, distance_km, score, catchphrase in payload["f"]:
+            facility = self.facilities.get_facility(facility_id)
+            if facility is None:
+                return None
+            facilities.append(
+                {
+                    "id": facility_id,
+                    "name": facility["name"],
+                    "address": facility["address"],
+                    "lat": facility["lat"],
+                    "lng": facility["lng"],
+                    "price": facility["price"],
+                    "distance_km": distance_km,
+                    "catchphrase": catchphrase,
+                    "score": score,
+                }
             )
 
-            return len(response.data) if response.data else 0
+        return {"facilities": facilities, "cached": False, "search_params": search_params}
+
+    def _build_row(
+        self, cache_key: str, search_params: Dict[str, Any], result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """search_cacheの行データを構築（upsertで上書きした場合もcreated_atを更新し、鮮度を戻す）"""
+        now = datetime.now(timezone.utc)
+        return {
+            "cache_key": cache_key,
+            "search_params": search_params,
+            "result": self._encode_result(result),
+            "created_at": now.isoformat(),
+            "expires_at": (now + timedelta(days=self.ttl_days)).isoformat(),
+        }
 
-        except Exception as e:
-            print(f"⚠️  期限切れキャッシュ削除エラー: {str(e)}")
-            return 0
+    async def _upsert_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        複数行をまとめてupsert（BatchWriterから呼ばれる）
+
+        同じcache_keyが複数あると1回のupsertで衝突するため、最後の行だけ残す
+        """
+        unique_rows = list({row["cache_key"]: row for row in rows}.values())
+        await self.client.table("search_cache").upsert(
+            unique_rows, returning=ReturnMethod.minimal
+        ).execute()
+
+    def start(self) -> None:
+        """バックグラウンド書き込みタスクを開始"""
+        self.writer.start()
+
+    async def stop(self) -> None:
+        """バックグラウンド書き込みタスクを停止（キューの残りを書き出す）"""
+        await self.writer.stop()
+
+    async def fetch_recent_search_params(
+        self, limit: int, page_size: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        保存日時の新しい順に検索パラメータを取得（キャッシュの事前投入用）
+
+        Args:
+            limit: 取得件数上限
+            page_size: 1リクエストあたりの取得件数
+
+        Returns:
+            search_paramsのリスト
+        """
+        params: List[Dict[str, Any]] = []
+        while len(params) < limit:
+            start = len(params)
+            end = min(start + page_size, limit) - 1
+            response = await (
+                self.client.table("search_cache")
+                .select("search_params")
+                .order("created_at", desc=True)
+                .order("cache_key")
+                .range(start, end)
+                .execute()
+            )
+            rows = response.data or []
+            params.extend(row["search_params"] for row in rows)
+            if len(rows) < end - start + 1:
+                break
+
+        return params
+
+    async def delete_expired_batch(self, batch_size: int) -> int:
+        """
+        期限切れキャッシュを古い順に最大batch_size件削除（06_create_delete_expired_search_cache.sql）
+
+        削除した行は返さず、件数だけを受け取る
+
+        Args:
+            batch_size: 1回で削除する最大件数
+
+        Returns:
+            削除件数
+        """
+        response = await self.client.rpc(
+            "delete_expired_search_cache", {"p_batch_size": batch_size}
+        ).execute()
+
+        return response.data or 0
+
+    async def count_expired(self) -> int:
+        """
+        期限切れキャッシュの件数（削除せずに確認する用）
+
+        Returns:
+            期限切れ件数
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        response = await (
+            self.client.table("search_cache")
+            .select("cache_key", count="exact")
+            .lt("expires_at", now)
+            .limit(1)
+            .execute()
+        )
+
+        return response.count or 0
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュの統計情報"""
+        return {
+            "l1": self.l1.stats(),
+            "l2": {"hits": self.l2_hits, "misses": self.l2_misses},
+            "stale_hits": self.stale_hits,
+            "rehydrate_misses": self.rehydrate_misses,
+            "empty_areas": self.empty_areas.stats(),
+            "writer": self.writer.stats(),
+            "quantizer": self.quantizer.stats(),
+        }
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """SupabaseのTIMESTAMPTZ文字列をaware datetimeに変換"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
 
 # シングルトンインスタンス
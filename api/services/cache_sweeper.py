@@ -0,0 +1,119 @@
+"""
+期限切れキャッシュの削除
+search_cacheの期限切れ行を上限件数ずつ削除する（APIのバックグラウンドタスク / data/scripts/sweep_search_cache.py）
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from api.core.config import settings
+from api.services.cache_service import cache_service
+
+
+class CacheSweeper:
+    """
+    期限切れキャッシュの定期削除
+
+    - 1バッチ = 1回の削除関数呼び出し（expires_atの古い順に最大batch_size件、1トランザクション）
+    - バッチ間でpause_seconds待機し、DBへの負荷を平準化する
+    - 削除件数がbatch_size未満になるか、max_batches回に達したら1回の掃除を終える（0: 無制限）
+    - 複数ワーカーで同時に動いても、ロック中の行はスキップされるため待ち合わせない
+    """
+
+    def __init__(self):
+        self.cache = cache_service
+        self.enabled = settings.CACHE_SWEEP_ENABLED
+        self.interval_seconds = settings.CACHE_SWEEP_INTERVAL_SECONDS
+        self.batch_size = settings.CACHE_SWEEP_BATCH_SIZE
+        self.pause_seconds = settings.CACHE_SWEEP_PAUSE_SECONDS
+        self.max_batches = settings.CACHE_SWEEP_MAX_BATCHES
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.errors = 0
+        self.deleted_total = 0
+        self.last_deleted = 0
+        self.last_run_at: Optional[float] = None
+
+    async def sweep(
+        self,
+        batch_size: Optional[int] = None,
+        pause_seconds: Optional[float] = None,
+        max_batches: Optional[int] = None,
+    ) -> int:
+        """
+        期限切れキャッシュをバッチごとに削除
+
+        Args:
+            batch_size: 1バッチの最大削除件数（省略時は設定値）
+            pause_seconds: バッチ間の待機秒数（省略時は設定値）
+            max_batches: 最大バッチ数（省略時は設定値、0: 無制限）
+
+        Returns:
+            削除件数
+        """
+        batch_size = self.batch_size if batch_size is None else batch_size
+        pause_seconds = self.pause_seconds if pause_seconds is None else pause_seconds
+        max_batches = self.max_batches if max_batches is None else max_batches
+
+        deleted = 0
+        batches = 0
+        try:
+            while True:
+                count = await self.cache.delete_expired_batch(batch_size)
+                deleted += count
+                batches += 1
+
+                if count < batch_size or (max_batches and batches >= max_batches):
+                    break
+                await asyncio.sleep(pause_seconds)
+        finally:
+            # 途中で失敗しても削除済みの件数は記録する
+            self.runs += 1
+            self.deleted_total += deleted
+            self.last_deleted = deleted
+            self.last_run_at = time.time()
+
+        return deleted
+
+    def start(self) -> None:
+        """バックグラウンド削除タスクを開始"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        """バックグラウンド削除タスクを停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sweep_loop(self) -> None:
+        """定期的な削除"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                deleted = await self.sweep()
+                if deleted:
+                    print(f"🧹 期限切れキャッシュ削除: {deleted}件")
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  期限切れキャッシュ削除エラー: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """削除の統計情報"""
+        return {
+            "enabled": self.enabled,
+            "runs": self.runs,
+            "errors": self.errors,
+            "deleted_total": self.deleted_total,
+            "last_deleted": self.last_deleted,
+            "last_run_at": self.last_run_at,
+        }
+
+
+# シングルトンインスタンス
+cache_sweeper = CacheSweeper()
@@ -0,0 +1,104 @@
+"""
+キャッチフレーズ生成のマイクロバッチ
+同時に来た複数リクエストの施設を短い時間窓で集め、1回のOpenAI呼び出しで生成する
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+from api.core.config import settings
+from api.services.openai_service import openai_service, CatchphraseJob
+
+
+class CatchphraseBatcher:
+    """
+    キャッチフレーズ生成のバッチスケジューラ
+
+    - 最初のジョブから window_ms 経過、または max_facilities 件に達したら送信
+    - 1回のプロンプトで生成し、結果を各リクエストに振り分ける
+    - 失敗時は同じバッチの全リクエストに例外を返す
+    """
+
+    def __init__(self):
+        self.openai = openai_service
+        self.window_seconds = settings.CATCHPHRASE_BATCH_WINDOW_MS / 1000
+        self.max_facilities = settings.CATCHPHRASE_BATCH_MAX_FACILITIES
+
+        self._pending: List[Tuple[CatchphraseJob, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.jobs = 0
+
+    async def generate(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> List[str]:
+        """
+        キャッチフレーズ生成をバッチに積んで結果を待つ
+
+        Args:
+            facilities: 施設リスト
+            vibes: ユーザーのVibe選択
+            sensations: ユーザーのSensation選択
+
+        Returns:
+            キャッチフレーズのリスト（施設の順序と対応）
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for facility in facilities:
+            future = loop.create_future()
+            self._pending.append(((facility, vibes, sensations), future))
+            futures.append(future)
+
+        if len(self._pending) >= self.max_facilities:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self) -> None:
+        """溜まったジョブをmax_facilities件ずつ送信"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_facilities]
+            self._pending = self._pending[self.max_facilities :]
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[CatchphraseJob, asyncio.Future]]) -> None:
+        """1バッチを生成して結果を振り分ける"""
+        self.batches += 1
+        self.jobs += len(batch)
+
+        try:
+            catchphrases = await self.openai.generate_catchphrase_batch([job for job, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), catchphrase in zip(batch, catchphrases):
+            if not future.done():
+                future.set_result(catchphrase)
+
+    def stats(self) -> Dict[str, Any]:
+        """バッチの統計情報"""
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "avg_batch_size": round(self.jobs / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+
+# シングルトンインスタンス
+catchphrase_batcher = CatchphraseBatcher()
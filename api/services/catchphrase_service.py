@@ -0,0 +1,319 @@
+"""
+キャッチフレーズサービス
+施設 × 気分（Vibe/Sensation）ごとにキャッチフレーズをキャッシュし、
+事前生成分にもない施設だけOpenAIで生成する
+"""
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Iterable, Optional, Set, Tuple
+from api.core.config import settings
+from api.services.catchphrase_batcher import catchphrase_batcher
+from api.services.catchphrase_store import precomputed_catchphrases
+from api.services.openai_service import openai_service, DEFAULT_CATCHPHRASE
+from api.utils.ttl_cache import TTLCache
+from api.utils.vibe_mapping import VIBE_KEYWORDS, SENSATION_KEYWORDS, dominant_mood
+
+
+def mood_signature(vibes: Iterable[str], sensations: Iterable[str]) -> str:
+    """
+    気分の正規化キー（選択順に依存しない）
+
+    Args:
+        vibes: Vibe選択
+        sensations: Sensation選択
+
+    Returns:
+        例: "forest,hinoki,snow|トロトロ,プンプン"
+    """
+    return f"{','.join(sorted(vibes))}|{','.join(sorted(sensations))}"
+
+
+def dominant_signature(facility: Dict[str, Any], vibes: Iterable[str], sensations: Iterable[str]) -> str:
+    """
+    事前生成キャッチフレーズのキー（施設に対して支配的なVibe/Sensation 1個ずつ）
+
+    Args:
+        facility: 施設
+        vibes: Vibe選択
+        sensations: Sensation選択
+
+    Returns:
+        例: "forest|トロトロ"
+    """
+    vibe, sensation = dominant_mood(facility.get("keywords") or [], vibes, sensations)
+    return mood_signature([vibe], [sensation])
+
+
+def fallback_catchphrase(facility: Dict[str, Any], vibes: Iterable[str], sensations: Iterable[str]) -> str:
+    """
+    施設キーワードから組み立てる代替キャッチフレーズ（生成が締め切りに間に合わない場合）
+
+    支配的なVibe/Sensationに一致する施設キーワードを優先して使う
+
+    Args:
+        facility: 施設
+        vibes: Vibe選択
+        sensations: Sensation選択
+
+    Returns:
+        例: "檜×硫黄の湯"（キーワードがなければデフォルト）
+    """
+    keywords = facility.get("keywords") or []
+    vibe, sensation = dominant_mood(keywords, vibes, sensations)
+    vibe_keyword = next((k for k in keywords if k in VIBE_KEYWORDS[vibe]), None)
+    sensation_keyword = next((k for k in keywords if k in SENSATION_KEYWORDS[sensation]), None)
+
+    if vibe_keyword and sensation_keyword and vibe_keyword != sensation_keyword:
+        catchphrase = f"{vibe_keyword}×{sensation_keyword}の湯"
+    elif vibe_keyword or sensation_keyword:
+        catchphrase = f"{vibe_keyword or sensation_keyword}を楽しむ湯"
+    elif keywords:
+        catchphrase = f"{'・'.join(keywords[:2])}の湯"
+    else:
+        return DEFAULT_CATCHPHRASE
+
+    # 15文字以内に収まらない場合はデフォルト
+    return catchphrase if len(catchphrase) <= 15 else DEFAULT_CATCHPHRASE
+
+
+class CatchphraseService:
+    """
+    施設単位のキャッチフレーズキャッシュ
+
+    - キー: (施設ID, 気分の正規化キー) ※位置情報には依存しない
+    - TTL + LRUで上限管理
+    - キャッシュにない施設は事前生成キャッチフレーズ（支配的な気分で縮約）を参照
+    - キャッシュヒット分の節約トークン数を実績の平均から推定
+    - CATCHPHRASE_BATCHING_ENABLED時は他リクエストとまとめて生成
+    - 生成がCATCHPHRASE_DEADLINE_MSを超えたら施設キーワードの代替で即応答し、
+      生成はバックグラウンドで続けてキャッシュを埋める
+    """
+
+    def __init__(self):
+        self.openai = openai_service
+        self.batcher = catchphrase_batcher
+        self.precomputed = precomputed_catchphrases
+        self.deadline_seconds = settings.CATCHPHRASE_DEADLINE_MS / 1000
+        self.batching_enabled = settings.CATCHPHRASE_BATCHING_ENABLED
+        self.store = TTLCache(
+            max_entries=settings.CATCHPHRASE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.CATCHPHRASE_CACHE_TTL_SECONDS,
+        )
+        self.facility_hits = 0
+        self.facility_misses = 0
+        self.openai_calls_avoided = 0
+
+        self._background: Set[asyncio.Task] = set()
+        self.deadline_fired = 0
+        self.background_completed = 0
+        self.background_failed = 0
+
+    async def get_catchphrases(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> Tuple[List[str], bool]:
+        """
+        施設リストのキャッチフレーズを取得（キャッシュにない施設のみ生成）
+
+        Args:
+            facilities: 施設リスト（最大3件）
+            vibes: ユーザーのVibe選択
+            sensations: ユーザーのSensation選択
+
+        Returns:
+            (キャッチフレーズのリスト（施設の順序と対応）,
+             締め切りに間に合ったか（Falseなら一部が代替キャッチフレーズ）)
+        """
+        signature = mood_signature(vibes, sensations)
+
+        catchphrases: Dict[int, str] = {}
+        missing = []
+        for facility in facilities:
+            cached = self._lookup(facility, signature, vibes, sensations)
+            if cached is not None:
+                catchphrases[facility["id"]] = cached
+            else:
+                missing.append(facility)
+
+        self.facility_hits += len(facilities) - len(missing)
+        self.facility_misses += len(missing)
+
+        complete = True
+        if missing:
+            task = asyncio.ensure_future(
+                self._generate_and_store(missing, signature, vibes, sensations)
+            )
+            try:
+                if self.deadline_seconds > 0:
+                    generated = await asyncio.wait_for(asyncio.shield(task), self.deadline_seconds)
+                else:
+                    generated = await task
+            except asyncio.TimeoutError:
+                # 締め切り超過: 代替で応答し、生成はバックグラウンドで続けてキャッシュを埋める
+                self.deadline_fired += 1
+                self._background.add(task)
+                task.add_done_callback(self._finish_background)
+                generated = [fallback_catchphrase(facility, vibes, sensations) for facility in missing]
+                complete = False
+
+            for facility, catchphrase in zip(missing, generated):
+                catchphrases[facility["id"]] = catchphrase
+        else:
+            self.openai_calls_avoided += 1
+
+        return (
+            [catchphrases.get(facility["id"], DEFAULT_CATCHPHRASE) for facility in facilities],
+            complete,
+        )
+
+    async def stream_catchphrases(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """
+        施設リストのキャッチフレーズを確定した順に返す（ストリーミング版）
+
+        キャッシュ済みの施設を先に返し、残りはOpenAIのストリーミング出力から1件ずつ返す
+
+        Args:
+            facilities: 施設リスト（最大3件）
+            vibes: ユーザーのVibe選択
+            sensations: ユーザーのSensation選択
+
+        Yields:
+            (施設の添字, キャッチフレーズ)（全施設分）
+        """
+        signature = mood_signature(vibes, sensations)
+
+        missing = []
+        for index, facility in enumerate(facilities):
+            cached = self._lookup(facility, signature, vibes, sensations)
+            if cached is not None:
+                yield index, cached
+            else:
+                missing.append((index, facility))
+
+        self.facility_hits += len(facilities) - len(missing)
+        self.facility_misses += len(missing)
+
+        if not missing:
+            self.openai_calls_avoided += 1
+            return
+
+        received = set()
+        async for position, catchphrase in self.openai.stream_catchphrases(
+            facilities=[facility for _, facility in missing],
+            vibes=vibes,
+            sensations=sensations,
+        ):
+            index, facility = missing[position]
+            received.add(position)
+            self.store.set((facility["id"], signature), catchphrase)
+            yield index, catchphrase
+
+        # パースできなかった施設はデフォルト（キャッシュしない）
+        for position, (index, _) in enumerate(missing):
+            if position not in received:
+                yield index, DEFAULT_CATCHPHRASE
+
+    def missing_facilities(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> List[Dict[str, Any]]:
+        """
+        キャッシュにも事前生成にもない施設（OpenAIでの生成が必要な施設）
+
+        Args:
+            facilities: 施設リスト
+            vibes: ユーザーのVibe選択
+            sensations: ユーザーのSensation選択
+
+        Returns:
+            生成が必要な施設のリスト
+        """
+        signature = mood_signature(vibes, sensations)
+        return [
+            facility
+            for facility in facilities
+            if self._lookup(facility, signature, vibes, sensations) is None
+        ]
+
+    def _lookup(
+        self, facility: Dict[str, Any], signature: str, vibes: List[str], sensations: List[str]
+    ) -> Optional[str]:
+        """キャッシュ → 事前生成の順にキャッチフレーズを探す"""
+        cached = self.store.get((facility["id"], signature))
+        if cached is None and self.precomputed.enabled:
+            cached = self.precomputed.get(
+                facility["id"], dominant_signature(facility, vibes, sensations)
+            )
+        return cached
+
+    async def _generate_and_store(
+        self,
+        facilities: List[Dict[str, Any]],
+        signature: str,
+        vibes: List[str],
+        sensations: List[str],
+    ) -> List[str]:
+        """キャッチフレーズを生成してキャッシュに保存"""
+        generated = await self._generate(facilities, vibes, sensations)
+        for facility, catchphrase in zip(facilities, generated):
+            # パース失敗時のデフォルトはキャッシュしない
+            if catchphrase != DEFAULT_CATCHPHRASE:
+                self.store.set((facility["id"], signature), catchphrase)
+        return generated
+
+    def _finish_background(self, task: asyncio.Task) -> None:
+        """締め切り後に完了したバックグラウンド生成の後処理"""
+        self._background.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.background_failed += 1
+            print(f"⚠️  キャッチフレーズのバックグラウンド生成エラー: {str(task.exception())}")
+        else:
+            self.background_completed += 1
+
+    async def _generate(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> List[str]:
+        """OpenAIでキャッチフレーズ生成（バッチ有効時は他リクエストとまとめる）"""
+        if self.batching_enabled:
+            return await self.batcher.generate(facilities, vibes, sensations)
+        return await self.openai.generate_catchphrases(
+            facilities=facilities,
+            vibes=vibes,
+            sensations=sensations,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュの統計情報（節約トークン数は実績平均からの推定値）"""
+        return {
+            "store": self.store.stats(),
+            "facility_hits": self.facility_hits,
+            "facility_misses": self.facility_misses,
+            "openai_calls_avoided": self.openai_calls_avoided,
+            "estimated_tokens_saved": round(
+                self.facility_hits * self.openai.tokens_per_facility()
+            ),
+            "deadline_ms": settings.CATCHPHRASE_DEADLINE_MS,
+            "deadline_fired": self.deadline_fired,
+            "background_inflight": len(self._background),
+            "background_completed": self.background_completed,
+            "background_failed": self.background_failed,
+            "precomputed": self.precomputed.stats(),
+            "batching": self.batcher.stats() if self.batching_enabled else None,
+        }
+
+
+# シングルトンインスタンス
+catchphrase_service = CatchphraseService()
@@ -0,0 +1,136 @@
+"""
+事前生成キャッチフレーズストア
+catchphrase_precomputedテーブル（data/scripts/precompute_catchphrases.pyで生成）を
+メモリ上に保持し、Drift検索でOpenAIを呼ぶ前に参照する
+"""
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+from api.core.config import settings
+from api.services.supabase_client import supabase_service
+
+
+class PrecomputedCatchphraseStore:
+    """
+    インメモリの事前生成キャッチフレーズ
+
+    - キー: (施設ID, 支配的な気分の正規化キー) 例: (1, "forest|トロトロ")
+    - 起動時に全件ロードし、バックグラウンドで定期的に更新チェック（件数 + 最新created_at）
+    - ロード失敗時は空のまま（OpenAI生成にフォールバック）
+    """
+
+    def __init__(self):
+        self.supabase = supabase_service
+        self.enabled = settings.CATCHPHRASE_PRECOMPUTED_ENABLED
+        self.refresh_seconds = settings.CATCHPHRASE_PRECOMPUTED_REFRESH_SECONDS
+
+        self._entries: Dict[Tuple[int, str], str] = {}
+        self._version: Optional[Tuple[int, Optional[str]]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, facility_id: int, signature: str) -> Optional[str]:
+        """
+        事前生成キャッチフレーズを取得
+
+        Args:
+            facility_id: 施設ID
+            signature: 支配的な気分の正規化キー
+
+        Returns:
+            キャッチフレーズ または None
+        """
+        catchphrase = self._entries.get((facility_id, signature))
+        if catchphrase is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return catchphrase
+
+    async def load(self) -> int:
+        """
+        catchphrase_precomputedを全件ロードして置き換える
+
+        Returns:
+            ロードした件数
+        """
+        async with self._lock:
+            version = await self.supabase.get_precomputed_catchphrase_version()
+            rows = await self.supabase.fetch_precomputed_catchphrases()
+
+            # 参照を一度に差し替える
+            self._entries = {
+                (row["facility_id"], row["mood_signature"]): row["catchphrase"] for row in rows
+            }
+            self._version = version
+            self._loaded_at = time.time()
+
+            return len(rows)
+
+    async def refresh_if_changed(self) -> bool:
+        """
+        テーブルに変更があれば再ロード
+
+        Returns:
+            再ロードしたらTrue
+        """
+        version = await self.supabase.get_precomputed_catchphrase_version()
+        if version == self._version:
+            return False
+
+        count = await self.load()
+        print(f"🔄 事前生成キャッチフレーズ更新: {count}件")
+        return True
+
+    async def start(self) -> None:
+        """初回ロードとバックグラウンド更新タスクの開始"""
+        if not self.enabled:
+            return
+
+        try:
+            count = await self.load()
+            print(f"✅ 事前生成キャッチフレーズロード完了: {count}件")
+        except Exception as e:
+            print(f"⚠️  事前生成キャッチフレーズロードエラー: {str(e)}")
+
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """バックグラウンド更新タスクの停止"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        """定期的な更新チェック"""
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh_if_changed()
+            except Exception as e:
+                print(f"⚠️  事前生成キャッチフレーズ更新エラー: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """ストアの統計情報"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "loaded_at": self._loaded_at,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# シングルトンインスタンス
+precomputed_catchphrases = PrecomputedCatchphraseStore()
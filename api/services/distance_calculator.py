@@ -2,6 +2,14 @@
 距離計算サービス（Haversine公式）
 """
 import math
+from typing import Callable, Optional, Tuple
+import numpy as np
+
+# 地球の半径（km）
+EARTH_RADIUS_KM = 6371.0
+
+# 緯度1度あたりの距離（km、矩形範囲計算用に切り捨て気味の値）
+KM_PER_DEGREE = 111.0
 
 
 def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
@@ -17,8 +25,7 @@ def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     Returns:
         距離（km）
     """
-    # 地球の半径（km）
-    R = 6371.0
+    R = EARTH_RADIUS_KM
 
     # ラジアンに変換
     lat1_rad = math.radians(lat1)
@@ -42,6 +49,74 @@ def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     return round(distance, 2)  # 小数点第2位まで
 
 
+def haversine_distances(
+    lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray
+) -> np.ndarray:
+    """
+    1地点から複数地点への距離をまとめて計算（Haversine公式のベクトル化版）
+
+    haversine_distanceと同じ値（小数点第2位で丸め）を返す
+
+    Args:
+        lat: 基準地点の緯度
+        lng: 基準地点の経度
+        lats: 対象地点の緯度配列
+        lngs: 対象地点の経度配列
+
+    Returns:
+        距離（km）の配列
+    """
+    lat1_rad = math.radians(lat)
+    lng1_rad = math.radians(lng)
+    lat2_rad = np.radians(lats)
+    lng2_rad = np.radians(lngs)
+
+    dlat = lat2_rad - lat1_rad
+    dlng = lng2_rad - lng1_rad
+
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlng / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    distances = EARTH_RADIUS_KM * c
+
+    # 丸めの境界付近はスカラー版で再計算して完全に一致させる
+    return round_array(
+        distances,
+        2,
+        exact=lambda i: haversine_distance(lat, lng, float(lats[i]), float(lngs[i])),
+    )
+
+
+def round_array(
+    values: np.ndarray,
+    decimals: int = 2,
+    exact: Optional[Callable[[int], float]] = None,
+) -> np.ndarray:
+    """
+    配列をPython組み込みのround()と同じ結果になるよう丸める
+
+    np.roundは10^decimals倍してから丸めるため、ちょうど境界（x.xx5付近）の値で
+    round()と結果がずれることがある。境界付近の要素だけスカラーで丸め直す
+
+    Args:
+        values: 丸める配列
+        decimals: 小数点以下の桁数
+        exact: 境界付近の要素の値を返す関数（添字を受け取る）
+            省略時は round(values[i], decimals)
+
+    Returns:
+        丸めた配列
+    """
+    rounded = np.round(values, decimals)
+
+    scaled = values * (10**decimals)
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ambiguous:
+        rounded[i] = exact(i) if exact else round(float(values[i]), decimals)
+
+    return rounded
+
+
 def is_within_range(
     user_lat: float, user_lng: float, facility_lat: float, facility_lng: float, max_km: float = 50.0
 ) -> bool:
@@ -60,3 +135,24 @@ def is_within_range(
     """
     distance = haversine_distance(user_lat, user_lng, facility_lat, facility_lng)
     return distance <= max_km
+
+
+def bounding_box_deltas(lat: float, max_km: float) -> Tuple[float, float]:
+    """
+    指定半径を含む矩形範囲の緯度・経度の幅を計算
+
+    高緯度では経度1度あたりの距離が短くなるため、経度方向は
+    範囲内で最も極に近い緯度のcosで補正する
+
+    Args:
+        lat: 中心の緯度
+        max_km: 半径（km）
+
+    Returns:
+        (緯度の幅, 経度の幅)（度）
+    """
+    lat_delta = max_km / KM_PER_DEGREE
+    far_lat = min(abs(lat) + lat_delta, 90.0)
+    cos_lat = max(math.cos(math.radians(far_lat)), 1e-6)
+    lng_delta = min(max_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return lat_delta, lng_delta
@@ -0,0 +1,180 @@
+"""
+施設インデックスサービス
+onsen_masterテーブルをメモリ上に保持し、Drift検索をネットワークなしで処理する
+"""
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from api.core.config import settings
+from api.services.facility_table import FacilityTable
+from api.services.spatial_index import GridIndex
+from api.services.supabase_client import supabase_service
+
+
+class FacilityIndex:
+    """
+    インメモリ施設インデックス
+
+    - 起動時にonsen_masterを全件ロード
+    - バックグラウンドで定期的に更新チェック（件数 + 最新updated_at）
+    - 変更があった場合のみ再ロード
+    - 半径検索はグリッドインデックスで近傍セルのみ走査
+    """
+
+    def __init__(self):
+        self.supabase = supabase_service
+        self.enabled = settings.FACILITY_INDEX_ENABLED
+        self.refresh_seconds = settings.FACILITY_INDEX_REFRESH_SECONDS
+        self.grid_cell_km = settings.FACILITY_INDEX_GRID_CELL_KM
+
+        self._table = FacilityTable([])
+        self._grid = GridIndex(self.grid_cell_km)
+        self._version: Optional[Tuple[int, Optional[str]]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """インデックスが検索に使用可能か"""
+        return self.enabled and self._loaded_at is not None
+
+    async def load(self) -> int:
+        """
+        onsen_masterを全件ロードしてインデックスを置き換える
+
+        Returns:
+            ロードした施設数
+        """
+        async with self._lock:
+            version = await self.supabase.get_onsen_version()
+            facilities = await self.supabase.fetch_all_onsen()
+
+            table = FacilityTable(facilities)
+            grid = GridIndex(self.grid_cell_km)
+            grid.build(table.lats, table.lngs)
+
+            # 参照を一度に差し替える（検索中のリクエストは旧データを使い切る）
+            self._table = table
+            self._grid = grid
+            self._version = version
+            self._loaded_at = time.time()
+
+            return len(facilities)
+
+    async def refresh_if_changed(self) -> bool:
+        """
+        onsen_masterに変更があれば再ロード
+
+        Returns:
+            再ロードしたらTrue
+        """
+        version = await self.supabase.get_onsen_version()
+        if version == self._version:
+            return False
+
+        count = await self.load()
+        print(f"🔄 施設インデックス更新: {count}件")
+        return True
+
+    async def start(self) -> None:
+        """初回ロードとバックグラウンド更新タスクの開始"""
+        if not self.enabled:
+            return
+
+        try:
+            count = await self.load()
+            print(f"✅ 施設インデックスロード完了: {count}件")
+        except Exception as e:
+            # ロード失敗時はSupabase直接検索にフォールバック
+            print(f"⚠️  施設インデックスロードエラー: {str(e)}")
+
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """バックグラウンド更新タスクの停止"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        """定期的な更新チェック"""
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh_if_changed()
+            except Exception as e:
+                print(f"⚠️  施設インデックス更新エラー: {str(e)}")
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        """最終ロード時刻（未ロードならNone）"""
+        return self._loaded_at
+
+    @property
+    def facilities(self) -> List[Dict[str, Any]]:
+        """ロード済みの施設リスト（ID順、未ロードなら空）"""
+        return self._table.facilities
+
+    def get_facility(self, facility_id: int) -> Optional[Dict[str, Any]]:
+        """
+        IDで施設を取得
+
+        Args:
+            facility_id: 施設ID
+
+        Returns:
+            施設データ または None（未ロード・存在しない場合）
+        """
+        return self._table.get(facility_id)
+
+    def count_nearby(self, lat: float, lng: float, max_distance_km: float) -> int:
+        """
+        半径内の施設数
+
+        Args:
+            lat: 緯度
+            lng: 経度
+            max_distance_km: 半径（km）
+
+        Returns:
+            施設数
+        """
+        positions, _ = self._grid.query(lat, lng, max_distance_km)
+        return len(positions)
+
+    def query_nearby(
+        self, lat: float, lng: float, max_distance_km: float
+    ) -> Tuple[FacilityTable, np.ndarray, np.ndarray]:
+        """
+        半径内の施設を距離順に取得
+
+        Args:
+            lat: ユーザーの緯度
+            lng: ユーザーの経度
+            max_distance_km: 最大距離（km）
+
+        Returns:
+            (施設テーブル, 施設の添字配列, 距離km配列)（距離の昇順）
+        """
+        table, grid = self._table, self._grid
+        positions, distances = grid.query(lat, lng, max_distance_km)
+        return table, positions, distances
+
+    def stats(self) -> Dict[str, Any]:
+        """インデックスの状態"""
+        return {
+            "ready": self.is_ready,
+            "facilities": len(self._table),
+            "loaded_at": self._loaded_at,
+        }
+
+
+# シングルトンインスタンス
+facility_index = FacilityIndex()
@@ -0,0 +1,76 @@
+"""
+施設テーブル
+施設データを列指向の配列に変換し、距離・キーワードマッチをまとめて計算できるようにする
+"""
+from typing import List, Dict, Any, Optional
+import numpy as np
+from api.utils.keyword_vocabulary import keyword_vocabulary, popcount_rows
+from api.utils.vibe_mapping import KeywordSet
+
+
+class FacilityTable:
+    """
+    施設データの列指向表現（ベクトル化スコアリング用）
+
+    - lats / lngs: 緯度経度の連続したfloat64配列
+    - keyword_masks: 施設ごとのキーワードビットマスク（施設 × uint64ワード）
+    """
+
+    def __init__(self, facilities: List[Dict[str, Any]]):
+        self.facilities = facilities
+        self.positions_by_id = {facility["id"]: position for position, facility in enumerate(facilities)}
+        self.lats = np.array([facility["lat"] for facility in facilities], dtype=np.float64)
+        self.lngs = np.array([facility["lng"] for facility in facilities], dtype=np.float64)
+
+        # 施設キーワードを共通語彙に登録してからマスク幅を決める
+        for facility in facilities:
+            for keyword in facility.get("keywords") or []:
+                keyword_vocabulary.intern(keyword)
+
+        self.mask_words = keyword_vocabulary.word_count()
+        self.keyword_masks = np.zeros((len(facilities), self.mask_words), dtype=np.uint64)
+        for position, facility in enumerate(facilities):
+            self.keyword_masks[position] = keyword_vocabulary.encode(
+                facility.get("keywords") or [], self.mask_words
+            )
+
+    def _query_mask(self, keyword_set: KeywordSet) -> np.ndarray:
+        """事前計算済みマスクをこのテーブルのマスク幅に合わせる"""
+        if len(keyword_set.mask) == self.mask_words:
+            return keyword_set.mask
+        mask = np.zeros(self.mask_words, dtype=np.uint64)
+        mask[: len(keyword_set.mask)] = keyword_set.mask
+        return mask
+
+    def count_matches(
+        self, positions: np.ndarray, keyword_set: KeywordSet, backend: str = "bitset"
+    ) -> np.ndarray:
+        """
+        指定施設ごとに、キーワード集合のうち所持している数を数える
+
+        Args:
+            positions: 施設の添字配列
+            keyword_set: キーワード集合（vibe_mappingで事前計算済み）
+            backend: "bitset"（マスクのAND + popcount）または "list"（リスト走査）
+
+        Returns:
+            マッチ数の配列
+        """
+        if backend == "list":
+            counts = np.zeros(len(positions), dtype=np.int64)
+            for i, position in enumerate(positions):
+                facility_keywords = self.facilities[position].get("keywords") or []
+                counts[i] = sum(
+                    1 for keyword in keyword_set.keywords if keyword in facility_keywords
+                )
+            return counts
+
+        return popcount_rows(self.keyword_masks[positions] & self._query_mask(keyword_set))
+
+    def get(self, facility_id: int) -> Optional[Dict[str, Any]]:
+        """IDで施設を取得（存在しなければNone）"""
+        position = self.positions_by_id.get(facility_id)
+        return self.facilities[position] if position is not None else None
+
+    def __len__(self) -> int:
+        return len(self.facilities)
@@ -0,0 +1,124 @@
+"""
+位置の量子化サービス
+キャッシュキー用に、ユーザー位置を近いユーザー同士で共有できるセルに丸める
+"""
+from typing import Any, Dict, Optional, Tuple
+from api.core.config import settings
+from api.services.facility_index import facility_index
+from api.utils import geohash
+
+
+class LocationQuantizer:
+    """
+    キャッシュキーの位置量子化
+
+    - round2: 緯度経度を小数点第2位に丸める（約1.1km）
+    - geohash: Geohashセルに丸める。精度は施設の密度で切り替える
+      - 粗いセル（CACHE_GEOHASH_PRECISION）の中心から半径CACHE_GEOHASH_DENSITY_RADIUS_KM内の
+        施設数がCACHE_GEOHASH_DENSE_THRESHOLD以上なら細かいセル（CACHE_GEOHASH_DENSE_PRECISION）
+      - 密度は粗いセルごとにメモ化（施設インデックスの再ロードでクリア）
+      - 施設インデックス未ロード時は細かいセル（共有は減るが結果は変わりにくい）
+    """
+
+    def __init__(self):
+        self.index = facility_index
+        self.mode = settings.CACHE_KEY_QUANTIZATION
+        self.precision = settings.CACHE_GEOHASH_PRECISION
+        self.dense_precision = settings.CACHE_GEOHASH_DENSE_PRECISION
+        self.dense_threshold = settings.CACHE_GEOHASH_DENSE_THRESHOLD
+        self.density_radius_km = settings.CACHE_GEOHASH_DENSITY_RADIUS_KM
+
+        self._precisions: Dict[str, int] = {}
+        self._index_loaded_at: Optional[float] = None
+
+    def quantize(self, lat: float, lng: float) -> Dict[str, Any]:
+        """
+        位置をキャッシュキー用に量子化
+
+        Args:
+            lat: 緯度
+            lng: 経度
+
+        Returns:
+            キャッシュキーに含める位置情報
+        """
+        if self.mode == "round2":
+            return {"lat": round(lat, 2), "lng": round(lng, 2)}
+
+        return {"geohash": self.cell(lat, lng)}
+
+    def cell_bounds(self, lat: float, lng: float) -> Tuple[float, float, float, float]:
+        """
+        位置を含むセル（キャッシュキーが同じになる範囲）
+
+        Args:
+            lat: 緯度
+            lng: 経度
+
+        Returns:
+            (最小緯度, 最大緯度, 最小経度, 最大経度)
+        """
+        if self.mode == "round2":
+            rounded_lat, rounded_lng = round(lat, 2), round(lng, 2)
+            return rounded_lat - 0.005, rounded_lat + 0.005, rounded_lng - 0.005, rounded_lng + 0.005
+
+        return geohash.bounds(self.cell(lat, lng))
+
+    def cell(self, lat: float, lng: float) -> str:
+        """
+        位置を含むGeohashセル（密度に応じた精度）
+
+        Args:
+            lat: 緯度
+            lng: 経度
+
+        Returns:
+            Geohash文字列
+        """
+        coarse = geohash.encode(lat, lng, self.precision)
+        precision = self.precision_for(coarse)
+        if precision == self.precision:
+            return coarse
+        return geohash.encode(lat, lng, precision)
+
+    def precision_for(self, coarse: str) -> int:
+        """
+        粗いセルに対して使う精度
+
+        Args:
+            coarse: 粗い精度のGeohash
+
+        Returns:
+            Geohashの精度
+        """
+        if not self.index.is_ready:
+            return self.dense_precision
+
+        # 施設インデックスが再ロードされたら密度を計算し直す
+        if self.index.loaded_at != self._index_loaded_at:
+            self._precisions.clear()
+            self._index_loaded_at = self.index.loaded_at
+
+        precision = self._precisions.get(coarse)
+        if precision is None:
+            lat, lng = geohash.center(coarse)
+            count = self.index.count_nearby(lat, lng, self.density_radius_km)
+            precision = self.dense_precision if count >= self.dense_threshold else self.precision
+            self._precisions[coarse] = precision
+
+        return precision
+
+    def stats(self) -> Dict[str, Any]:
+        """量子化の状態"""
+        dense_cells = sum(1 for p in self._precisions.values() if p == self.dense_precision)
+        return {
+            "mode": self.mode,
+            "precision": self.precision,
+            "dense_precision": self.dense_precision,
+            "cells": len(self._precisions),
+            "dense_cells": dense_cells,
+        }
+
+
+# シングルトンインスタンス
+location_quantizer = LocationQuantizer()
@@ -2,18 +2,58 @@
 OpenAI APIサービス
 キャッチフレーズ生成（コスト最適化：3施設まとめて生成）
 """
-from typing import List, Dict, Any
-from openai import OpenAI
-from api.core.config import settings
+import re
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from openai import AsyncOpenAI
+from api.core.clients import create_openai_client
+
+
+# パース失敗時などのデフォルトキャッチフレーズ
+DEFAULT_CATCHPHRASE = "温泉を楽しむ"
+
+SYSTEM_PROMPT = "あなたは日帰り温泉のキャッチコピーライターです。ユーザーの気分（Vibe/Sensation）に合わせて、施設の魅力を15文字以内で表現してください。"
+
+# 見積もり用: 1施設あたりの出力トークン数（"1. " + 15文字以内 + 改行）
+COMPLETION_TOKENS_PER_FACILITY = 20
+
+# Vibeの日本語表記
+VIBE_LABELS_JA = {
+    "forest": "森",
+    "city": "都会",
+    "snow": "雪",
+    "bonfire": "焚き火",
+    "hinoki": "檜",
+    "concrete": "コンクリート",
+    "ocean": "海",
+    "cave": "洞窟",
+    "morning": "朝",
+    "sunset": "夕日",
+    "solo": "一人",
+    "party": "グループ",
+}
+
+# "1. キャッチフレーズ" / "10) キャッチフレーズ" / "２．キャッチフレーズ" 形式の行
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)\s*[\.．\)）:：、]\s*(.+)$")
+
+# (施設, Vibe選択, Sensation選択)
+CatchphraseJob = Tuple[Dict[str, Any], List[str], List[str]]
 
 
 class OpenAIService:
     """OpenAI GPT-4o-miniを使用したキャッチフレーズ生成"""
 
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client: AsyncOpenAI = create_openai_client()
         self.model = "gpt-4o-mini"  # 最安モデル
 
+        # 使用量の統計
+        self.requests = 0
+        self.facilities_generated = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # ストリーミングは使用量が返らないため別に数える（平均トークン数の計算から除外）
+        self.stream_requests = 0
+
     async def generate_catchphrases(
         self,
         facilities: List[Dict[str, Any]],
@@ -37,25 +77,115 @@ class OpenAIService:
         # プロンプト構築
         prompt = self._build_prompt(facilities, vibes, sensations)
 
-        # OpenAI API呼び出し
-        response = self.client.chat.completions.create(
+        return await self._complete(prompt, len(facilities), max_tokens=200)
+
+    async def generate_catchphrase_batch(self, jobs: List[CatchphraseJob]) -> List[str]:
+        """
+        複数リクエスト分の施設のキャッチフレーズを1回のAPI呼び出しで生成
+
+        施設ごとに気分（Vibe/Sensation）が異なってもよい
+
+        Args:
+            jobs: (施設, Vibe選択, Sensation選択) のリスト
+
+        Returns:
+            キャッチフレーズのリスト（jobsの順序と対応）
+        """
+        if not jobs:
+            return []
+
+        prompt = self._build_batch_prompt(jobs)
+
+        # 1施設あたり約60トークン + 余裕
+        return await self._complete(prompt, len(jobs), max_tokens=60 * len(jobs) + 20)
+
+    async def stream_catchphrases(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """
+        3施設分のキャッチフレーズをストリーミングで生成し、1行パースできるごとに返す
+
+        Args:
+            facilities: 施設リスト（最大3件）
+            vibes: ユーザーのVibe選択
+            sensations: ユーザーのSensation選択
+
+        Yields:
+            (施設の添字, キャッチフレーズ)（生成された順、取れなかった施設は返さない）
+        """
+        if not facilities or len(facilities) > 3:
+            raise ValueError("施設は1-3件で指定してください")
+
+        count = len(facilities)
+        prompt = self._build_prompt(facilities, vibes, sensations)
+
+        stream = await self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {
-                    "role": "system",
-                    "content": "あなたは日帰り温泉のキャッチコピーライターです。ユーザーの気分（Vibe/Sensation）に合わせて、施設の魅力を15文字以内で表現してください。",
-                },
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.8,  # クリエイティブに
+            temperature=0.8,
             max_tokens=200,
+            stream=True,
+        )
+        self.stream_requests += 1
+
+        emitted = set()
+        buffer = ""
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            buffer += chunk.choices[0].delta.content or ""
+
+            # 改行まで届いた行だけパースする
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                parsed = self._parse_line(line, count)
+                if parsed and parsed[0] not in emitted:
+                    emitted.add(parsed[0])
+                    yield parsed
+
+        parsed = self._parse_line(buffer, count)
+        if parsed and parsed[0] not in emitted:
+            yield parsed
+
+    async def _complete(self, prompt: str, count: int, max_tokens: int) -> List[str]:
+        """
+        OpenAI API呼び出しとレスポンスパース
+
+        Args:
+            prompt: ユーザープロンプト
+            count: 施設数
+            max_tokens: 最大出力トークン数
+
+        Returns:
+            キャッチフレーズのリスト
+        """
+        # OpenAI API呼び出し（非同期）
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.8,  # クリエイティブに
+            max_tokens=max_tokens,
         )
 
+        # 使用量を記録
+        self.requests += 1
+        self.facilities_generated += count
+        if response.usage:
+            self.prompt_tokens += response.usage.prompt_tokens
+            self.completion_tokens += response.usage.completion_tokens
+
         # レスポンスパース
         catchphrases_text = response.choices[0].message.content.strip()
-        catchphrases = self._parse_catchphrases(catchphrases_text, len(facilities))
-
-        return catchphrases
+        return self._parse_catchphrases(catchphrases_text, count)
 
     def _build_prompt(
         self,
@@ -75,21 +205,7 @@ class OpenAIService:
             プロンプト文字列
         """
         # Vibe/Sensationを日本語化
-        vibe_map = {
-            "forest": "森",
-            "city": "都会",
-            "snow": "雪",
-            "bonfire": "焚き火",
-            "hinoki": "檜",
-            "concrete": "コンクリート",
-            "ocean": "海",
-            "cave": "洞窟",
-            "morning": "朝",
-            "sunset": "夕日",
-            "solo": "一人",
-            "party": "グループ",
-        }
-        vibes_ja = [vibe_map.get(v, v) for v in vibes]
+        vibes_ja = [VIBE_LABELS_JA.get(v, v) for v in vibes]
 
         prompt = f"""ユーザーの気分:
 Vibe: {', '.join(vibes_ja)}
@@ -118,6 +234,45 @@ Sensation: {', '.join(sensations)}
 - ユーザーの気分（Vibe/Sensation）を反映
 - 施設の特徴を活かす
 - 魅力的で行きたくなる表現
+"""
+
+        return prompt
+
+    def _build_batch_prompt(self, jobs: List[CatchphraseJob]) -> str:
+        """
+        バッチ用プロンプト構築（施設ごとに気分を記載）
+
+        Args:
+            jobs: (施設, Vibe選択, Sensation選択) のリスト
+
+        Returns:
+            プロンプト文字列
+        """
+        prompt = """以下の温泉施設それぞれに対して、施設ごとに記載したユーザーの気分に合う魅力的なキャッチフレーズを15文字以内で生成してください。
+
+"""
+
+        for i, (facility, vibes, sensations) in enumerate(jobs, 1):
+            vibes_ja = [VIBE_LABELS_JA.get(v, v) for v in vibes]
+            keywords = ", ".join(facility.get("keywords", [])[:5])  # 最初の5個
+            prompt += f"""{i}. {facility['name']}
+   住所: {facility['address']}
+   料金: {facility['price']}円
+   特徴: {keywords}
+   気分: Vibe: {', '.join(vibes_ja)} / Sensation: {', '.join(sensations)}
+
+"""
+
+        prompt += f"""各施設のキャッチフレーズを番号付きで1行ずつ、全{len(jobs)}件出力してください:
+1. [キャッチフレーズ]
+2. [キャッチフレーズ]
+...
+
+注意:
+- 15文字以内
+- 施設ごとの気分（Vibe/Sensation）を反映
+- 施設の特徴を活かす
+- 魅力的で行きたくなる表現
 """
 
         return prompt
@@ -126,6 +281,9 @@ Sensation: {', '.join(sensations)}
         """
         生成されたキャッチフレーズをパース
 
+        番号で施設と対応付けるため、件数が多くても行の抜け・余分な行があっても
+        取れた分は使い、取れなかった施設だけデフォルトにする
+
         Args:
             text: OpenAIのレスポンステキスト
             count: 施設数
@@ -133,25 +291,84 @@ Sensation: {', '.join(sensations)}
         Returns:
             キャッチフレーズリスト
         """
-        lines = text.strip().split("\n")
-        catchphrases = []
-
-        for line in lines:
-            line = line.strip()
-            # "1. キャッチフレーズ" 形式をパース
-            if line and len(line) > 3 and line[0].isdigit():
-                # 数字とピリオドを削除
-                catchphrase = line.split(".", 1)[-1].strip()
-                # 括弧も削除
-                catchphrase = catchphrase.strip("[]【】「」")
-                catchphrases.append(catchphrase)
+        catchphrases = [DEFAULT_CATCHPHRASE] * count
 
-        # 施設数と一致しない場合はデフォルト
-        if len(catchphrases) != count:
-            return ["温泉を楽しむ"] * count
+        for line in text.strip().split("\n"):
+            parsed = self._parse_line(line, count)
+            if parsed:
+                catchphrases[parsed[0]] = parsed[1]
 
         return catchphrases
 
+    def _parse_line(self, line: str, count: int) -> Optional[Tuple[int, str]]:
+        """
+        "1. キャッチフレーズ" 形式の1行をパース
+
+        Args:
+            line: レスポンスの1行
+            count: 施設数
+
+        Returns:
+            (施設の添字, キャッチフレーズ) または None
+        """
+        match = _NUMBERED_LINE.match(line)
+        if not match:
+            return None
+
+        number = int(match.group(1))
+        # 括弧も削除
+        catchphrase = match.group(2).strip().strip("[]【】「」").strip()
+        if 1 <= number <= count and catchphrase:
+            return number - 1, catchphrase
+        return None
+
+    def estimate_tokens(
+        self,
+        facilities: List[Dict[str, Any]],
+        vibes: List[str],
+        sensations: List[str],
+    ) -> Tuple[int, int]:
+        """
+        generate_catchphrasesの使用トークン数の見積もり（APIは呼ばない）
+
+        入力は日本語が大半のため1文字1トークンとして多めに見積もる。
+        出力は1施設あたりCOMPLETION_TOKENS_PER_FACILITYトークン
+
+        Args:
+            facilities: 施設リスト
+            vibes: Vibe選択
+            sensations: Sensation選択
+
+        Returns:
+            (入力トークン数, 出力トークン数)
+        """
+        prompt = self._build_prompt(facilities, vibes, sensations)
+        return (
+            len(SYSTEM_PROMPT) + len(prompt),
+            COMPLETION_TOKENS_PER_FACILITY * len(facilities),
+        )
+
+    def tokens_per_facility(self) -> float:
+        """1施設あたりの平均トークン数（実績）"""
+        if not self.facilities_generated:
+            return 0.0
+        return (self.prompt_tokens + self.completion_tokens) / self.facilities_generated
+
+    def stats(self) -> Dict[str, Any]:
+        """使用量の統計情報"""
+        return {
+            "requests": self.requests,
+            "facilities_generated": self.facilities_generated,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "stream_requests": self.stream_requests,
+            "tokens_per_facility": round(self.tokens_per_facility(), 1),
+        }
+
+    async def close(self) -> None:
+        """接続プールを閉じる"""
+        await self.client.close()
+
 
 # シングルトンインスタンス
 openai_service = OpenAIService()
@@ -2,10 +2,45 @@
 レート制限サービス
 Upstash Redisを使用したSliding Window Counter実装
 """
+import math
 import time
-from typing import Tuple
-from redis import Redis
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from redis.asyncio import Redis
+from api.core.clients import create_redis_client
 from api.core.config import settings
+from api.utils.circuit_breaker import CircuitBreaker
+from api.utils.sliding_window import LocalSlidingWindow
+from api.utils.token_bucket import TokenBucketFilter
+from api.utils.ttl_cache import TTLCache
+
+
+# スライディングウィンドウ判定（削除・カウント・追加・リセット計算を1往復でアトミックに実行）
+# KEYS[1]: レート制限キー
+# ARGV: 現在時刻, ウィンドウ, 上限, メンバー, キーのTTL（時刻・ウィンドウはprecision_ms単位の整数）
+# 戻り値: {許可(1/0), 残り回数, リセットまでの時間（precision_ms単位）}
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+
+if count >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    local reset = window
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + window - now
+    end
+    return {0, 0, reset}
+end
+
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('EXPIRE', key, ARGV[5])
+return {1, limit - count - 1, window}
+"""
 
 
 class RateLimiter:
@@ -14,19 +49,69 @@ class RateLimiter:
 
     - 5リクエスト/日/IP
     - Upstash Redis（REST API経由）
+    - 判定はLuaスクリプト1回（EVALSHA、SHAはクライアント側でキャッシュ）
+    - 時刻の精度はRATE_LIMIT_PRECISION_MS（同一時刻のリクエストも個別に数える）
+    - 前段にプロセス内トークンバケット: 確実に上限超過のクライアントはRedisに問い合わせずに拒否
+      （バケットはRedisで許可されたリクエストだけ消費するため、複数ワーカーでも誤拒否しない）
+    - Redisで拒否したクライアントはリセットまでプロセス内で拒否を返す（Redisに問い合わせない）
+    - ローカルでの拒否（拒否キャッシュ・トークンバケット）は、そのIPをRedisで判定してから
+      RATE_LIMIT_LOCAL_TRUST_SECONDS以内に限る（他のワーカーでのリセットをこの時間内に反映する）
+    - Redisが連続で失敗したらサーキットブレーカーを開き、クールダウン中は
+      プロセス内スライディングウィンドウで判定（Redisのタイムアウトを待たない）
     """
 
     def __init__(self):
-        # Upstash Redis接続（REST API）
+        # Upstash Redis接続（redis.asyncio、接続プール共有）
         # Note: redis-pyでRESTエンドポイントを使う場合の設定
         # 本番ではupstash-redisライブラリ推奨
-        self.redis_client = Redis.from_url(
-            settings.UPSTASH_REDIS_REST_URL,
-            decode_responses=True,
-        )
+        self.redis_client: Redis = create_redis_client()
 
         self.max_requests = settings.RATE_LIMIT_MAX_REQUESTS
         self.window_seconds = settings.RATE_LIMIT_WINDOW_SECONDS
+        self.precision_ms = settings.RATE_LIMIT_PRECISION_MS
+
+        # EVALSHAで実行（サーバーにスクリプトがなければEVALで登録し直す）
+        self._sliding_window = self.redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+        # ローカル前段フィルタ（無効時はNone）
+        self.local_filter: Optional[TokenBucketFilter] = None
+        if settings.RATE_LIMIT_LOCAL_FILTER_ENABLED:
+            self.local_filter = TokenBucketFilter(
+                capacity=self.max_requests,
+                window_seconds=self.window_seconds,
+                max_entries=settings.RATE_LIMIT_LOCAL_MAX_ENTRIES,
+            )
+
+        # Redisで判定したクライアント（この間だけローカルの拒否を信頼する）
+        self.confirmed = TTLCache(
+            max_entries=settings.RATE_LIMIT_LOCAL_MAX_ENTRIES,
+            ttl_seconds=settings.RATE_LIMIT_LOCAL_TRUST_SECONDS,
+        )
+
+        # 拒否済みクライアント（識別子 -> リセット時刻）
+        self.rejections: Optional[TTLCache] = None
+        if settings.RATE_LIMIT_REJECT_CACHE_ENABLED:
+            self.rejections = TTLCache(
+                max_entries=settings.RATE_LIMIT_LOCAL_MAX_ENTRIES,
+                ttl_seconds=self.window_seconds,
+            )
+
+        # Redis障害時のフォールバック
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.RATE_LIMIT_BREAKER_FAILURE_THRESHOLD,
+            cooldown_seconds=settings.RATE_LIMIT_BREAKER_COOLDOWN_SECONDS,
+        )
+        self.fallback = LocalSlidingWindow(
+            max_requests=self.max_requests,
+            window_seconds=self.window_seconds,
+            max_entries=settings.RATE_LIMIT_LOCAL_MAX_ENTRIES,
+        )
+
+        self.redis_checks = 0
+        self.redis_errors = 0
+        self.local_rejections = 0
+        self.cached_rejections = 0
+        self.fallback_checks = 0
 
     def _get_key(self, identifier: str) -> str:
         """
@@ -42,7 +127,7 @@ class RateLimiter:
 
     async def check_rate_limit(self, identifier: str) -> Tuple[bool, int, int]:
         """
-        レート制限チェック
+        レート制限チェック（Redisへの往復は1回）
 
         Args:
             identifier: 識別子（IPアドレス）
@@ -50,73 +135,133 @@ class RateLimiter:
         Returns:
             (許可するか, 残りリクエスト数, リセットまでの秒数)
         """
-        try:
-            key = self._get_key(identifier)
-            current_time = int(time.time())
+        # ローカルの拒否は信頼期間内だけ（過ぎたらRedisで確かめ直し、他ワーカーでのリセットを反映）
+        trusted = identifier in self.confirmed
 
-            # パイプライン実行（アトミック操作）
-            pipe = self.redis_client.pipeline()
+        # リセット前の拒否済みクライアントはRedisに問い合わせない
+        if trusted and self.rejections is not None:
+            reset_at = self.rejections.get(identifier)
+            if reset_at is not None:
+                self.cached_rejections += 1
+                return False, 0, max(1, math.ceil(reset_at - time.monotonic()))
 
-            # 古いタイムスタンプを削除
-            pipe.zremrangebyscore(key, 0, current_time - self.window_seconds)
+        # ローカルで上限超過が確定していればRedisに問い合わせない
+        # （リセットまでの秒数はRedisと同じく、ウィンドウ内で最も古いリクエストから計算）
+        local_exceeded = (
+            self.local_filter is not None and self.local_filter.retry_after(identifier) is not None
+        )
+        if trusted and local_exceeded:
+            reset_seconds = self.fallback.reset_seconds(identifier)
+            if reset_seconds is not None:
+                self.local_rejections += 1
+                self._cache_rejection(identifier, reset_seconds)
+                return False, 0, reset_seconds
+            # 履歴が破棄済み（LRU）ならリセット時刻が分からないためRedisで判定する
 
-            # 現在のウィンドウ内のリクエスト数を取得
-            pipe.zcard(key)
+        # ブレーカーが開いている間はRedisを呼ばない
+        if not self.breaker.allow_request():
+            self.fallback_checks += 1
+            return self.fallback.check(identifier)
 
-            # 新しいリクエストを追加
-            pipe.zadd(key, {str(current_time): current_time})
+        try:
+            key = self._get_key(identifier)
+            now = int(time.time() * 1000) // self.precision_ms
+            window = self.window_seconds * 1000 // self.precision_ms
 
-            # キーのTTL設定（ウィンドウサイズ + 余裕）
-            pipe.expire(key, self.window_seconds + 60)
+            # メンバーはリクエストごとに一意（同一時刻のリクエストが1件に潰れないように）
+            member = f"{now}:{uuid.uuid4().hex}"
 
-            results = pipe.execute()
+            allowed, remaining, reset = await self._sliding_window(
+                keys=[key],
+                args=[now, window, self.max_requests, member, self.window_seconds + 60],
+            )
 
-            # リクエスト数（zadd前の値）
-            request_count = results[1]
+        except Exception as e:
+            self.redis_errors += 1
+            self.breaker.record_failure()
+            print(f"⚠️  レート制限チェックエラー: {str(e)}")
+            # エラー時はプロセス内のスライディングウィンドウで判定
+            self.fallback_checks += 1
+            return self.fallback.check(identifier)
 
-            # レート制限チェック
-            if request_count >= self.max_requests:
-                # 制限超過 - 最古のリクエストタイムスタンプを取得
-                oldest = self.redis_client.zrange(key, 0, 0, withscores=True)
-                if oldest:
-                    oldest_timestamp = int(oldest[0][1])
-                    reset_seconds = self.window_seconds - (current_time - oldest_timestamp)
-                else:
-                    reset_seconds = self.window_seconds
+        self.redis_checks += 1
+        self.breaker.record_success()
 
-                # 追加したリクエストを削除（制限超過なので）
-                self.redis_client.zrem(key, str(current_time))
+        # ローカルでは上限超過なのにRedisで許可 → 他のワーカーでリセットされた（ローカルの状態を破棄）
+        if allowed and local_exceeded:
+            self._forget(identifier)
+        self.confirmed.set(identifier, True)
 
-                return False, 0, max(0, reset_seconds)
+        # Redisに記録されたリクエストだけローカルのバケット・フォールバック用の履歴に反映
+        if allowed:
+            if self.local_filter is not None:
+                self.local_filter.consume(identifier)
+            self.fallback.record(identifier)
 
-            # 許可
-            remaining = self.max_requests - request_count - 1
-            return True, remaining, self.window_seconds
+        reset_seconds = max(0, math.ceil(int(reset) * self.precision_ms / 1000))
 
-        except Exception as e:
-            print(f"⚠️  レート制限チェックエラー: {str(e)}")
-            # エラー時は許可（フェイルオープン）
-            return True, self.max_requests, self.window_seconds
+        if not allowed:
+            self._cache_rejection(identifier, reset_seconds)
+
+        return bool(allowed), int(remaining), reset_seconds
+
+    def _cache_rejection(self, identifier: str, reset_seconds: int) -> None:
+        """拒否をリセットまで記録（ウィンドウ内のリクエストは増えるだけなので、拒否は変わらない）"""
+        if self.rejections is not None and reset_seconds > 0:
+            self.rejections.set(identifier, time.monotonic() + reset_seconds, ttl_seconds=reset_seconds)
 
     async def reset(self, identifier: str) -> bool:
         """
         特定識別子のレート制限をリセット（管理者用）
 
+        このワーカーのローカルの状態は即時に破棄する。他のワーカーはローカルの拒否を
+        RATE_LIMIT_LOCAL_TRUST_SECONDS以内にRedisで確かめ直すため、その時間内に反映される
+
         Args:
             identifier: 識別子
 
         Returns:
             成功したらTrue
         """
+        self._forget(identifier)
+
         try:
             key = self._get_key(identifier)
-            self.redis_client.delete(key)
+            await self.redis_client.delete(key)
             return True
 
         except Exception as e:
             print(f"⚠️  レート制限リセットエラー: {str(e)}")
             return False
 
+    def _forget(self, identifier: str) -> None:
+        """プロセス内の識別子の状態（拒否キャッシュ・トークンバケット・フォールバック履歴）を削除"""
+        self.confirmed.pop(identifier)
+        if self.rejections is not None:
+            self.rejections.pop(identifier)
+        if self.local_filter is not None:
+            self.local_filter.discard(identifier)
+        self.fallback.discard(identifier)
+
+    def stats(self) -> Dict[str, Any]:
+        """レート制限の統計情報"""
+        return {
+            "redis_checks": self.redis_checks,
+            "redis_errors": self.redis_errors,
+            "local_rejections": self.local_rejections,
+            "cached_rejections": self.cached_rejections,
+            "rejection_cache": self.rejections.stats() if self.rejections is not None else None,
+            "trust_seconds": self.confirmed.ttl_seconds,
+            "fallback_checks": self.fallback_checks,
+            "fallback_tracked": len(self.fallback),
+            "breaker": self.breaker.stats(),
+            "local_filter": self.local_filter.stats() if self.local_filter is not None else None,
+        }
+
+    async def close(self) -> None:
+        """接続プールを閉じる"""
+        await self.redis_client.aclose()
+
 
 # シングルトンインスタンス
 rate_limiter = RateLimiter()
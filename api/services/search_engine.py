@@ -2,19 +2,52 @@
 ルールベース検索エンジン
 """
 from typing import List, Dict, Any
-from api.services.distance_calculator import haversine_distance
+import numpy as np
+from api.core.config import settings
+from api.services.distance_calculator import haversine_distances, round_array
 from api.services.supabase_client import supabase_service
-from api.utils.vibe_mapping import get_vibe_keywords, get_sensation_keywords
+from api.services.facility_index import facility_index
+from api.services.facility_table import FacilityTable
+from api.utils.vibe_mapping import KeywordSet, get_vibe_keyword_set, get_sensation_keyword_set
+
+
+def distance_score(distances):
+    """
+    距離スコア（50点満点、配列・スカラーどちらも可）
+
+    0-10km: 50点 / 10-30km: 50 → 30点 / 30-50km: 30 → 10点
+
+    Args:
+        distances: ユーザーからの距離（km）
+
+    Returns:
+        距離スコア
+    """
+    score = np.where(
+        distances <= 10,
+        50.0,
+        np.where(
+            distances <= 30,
+            50.0 - ((distances - 10) / 20) * 20,  # 50 → 30
+            30.0 - ((distances - 30) / 20) * 20,  # 30 → 10
+        ),
+    )
+    return np.maximum(0, score)
 
 
 class SearchEngine:
     """
     Drift検索エンジン
     ルールベースのキーワードマッチングとスコアリング
+
+    候補施設の距離・スコアはNumPy配列でまとめて計算する
+    キーワードマッチはビットマスクのAND + popcount（KEYWORD_MATCH_BACKEND）
     """
 
     def __init__(self):
         self.supabase = supabase_service
+        self.facility_index = facility_index
+        self.match_backend = settings.KEYWORD_MATCH_BACKEND
 
     async def search(
         self,
@@ -23,6 +56,7 @@ class SearchEngine:
         user_lat: float,
         user_lng: float,
         max_distance_km: float = 50.0,
+        top_k: int = 20,
     ) -> List[Dict[str, Any]]:
         """
         Drift検索実行
@@ -33,106 +67,89 @@ class SearchEngine:
             user_lat: ユーザー緯度
             user_lng: ユーザー経度
             max_distance_km: 最大距離（km）
+            top_k: 返却件数
 
         Returns:
-            スコア順にソートされた施設リスト（上位20件）
+            スコア順にソートされた施設リスト（上位top_k件）
         """
-        # キーワード取得
-        vibe_keywords = get_vibe_keywords(vibes)
-        sensation_keywords = get_sensation_keywords(sensations)
-        all_keywords = vibe_keywords + sensation_keywords
-
-        # Supabaseから候補施設を取得
-        facilities = await self.supabase.search_onsen_by_location_and_keywords(
-            lat=user_lat,
-            lng=user_lng,
-            keywords=all_keywords,
-            max_distance_km=max_distance_km,
-            limit=100,  # 広めに取得してアプリ側でフィルタ
-        )
-
-        # スコアリングとフィルタリング
-        scored_facilities = []
-        for facility in facilities:
-            # 距離計算
-            distance_km = haversine_distance(
-                user_lat, user_lng, facility["lat"], facility["lng"]
-            )
-
-            # 距離フィルタ
-            if distance_km > max_distance_km:
-                continue
-
-            # スコア計算
-            score = self._calculate_score(
-                facility=facility,
-                vibe_keywords=vibe_keywords,
-                sensation_keywords=sensation_keywords,
-                distance_km=distance_km,
+        # キーワード取得（組み合わせごとに事前計算済み）
+        vibe_keywords = get_vibe_keyword_set(vibes)
+        sensation_keywords = get_sensation_keyword_set(sensations)
+        all_keywords = list(vibe_keywords.keywords + sensation_keywords.keywords)
+
+        # 候補施設を取得（インデックスがあればメモリ上で完結）
+        if self.facility_index.is_ready:
+            table, positions, distances = self.facility_index.query_nearby(
+                user_lat, user_lng, max_distance_km
             )
-
-            scored_facilities.append(
-                {
-                    **facility,
-                    "distance_km": distance_km,
-                    "score": score,
-                }
+        else:
+            rows = await self.supabase.search_onsen_by_location_and_keywords(
+                lat=user_lat,
+                lng=user_lng,
+                keywords=all_keywords,
+                max_distance_km=max_distance_km,
+                limit=100,  # 近い順に100件
             )
+            table = FacilityTable(rows)
+            distances = haversine_distances(user_lat, user_lng, table.lats, table.lngs)
 
-        # スコア順にソート（降順）
-        scored_facilities.sort(key=lambda x: x["score"], reverse=True)
-
-        # 上位20件を返す
-        return scored_facilities[:20]
+            # 距離フィルタ
+            positions = np.flatnonzero(distances <= max_distance_km)
+            distances = distances[positions]
+
+        # スコア計算（全候補まとめて）
+        scores = self._calculate_scores(
+            table=table,
+            positions=positions,
+            vibe_keywords=vibe_keywords,
+            sensation_keywords=sensation_keywords,
+            distances=distances,
+        )
 
-    def _calculate_score(
+        # 上位top_k件のみ辞書化して返す
+        return [
+            {
+                **table.facilities[positions[i]],
+                "distance_km": float(distances[i]),
+                "score": float(scores[i]),
+            }
+            for i in self._select_top_k(scores, top_k)
+        ]
+
+    def _calculate_scores(
         self,
-        facility: Dict[str, Any],
-        vibe_keywords: List[str],
-        sensation_keywords: List[str],
-        distance_km: float,
-    ) -> float:
+        table: FacilityTable,
+        positions: np.ndarray,
+        vibe_keywords: KeywordSet,
+        sensation_keywords: KeywordSet,
+        distances: np.ndarray,
+    ) -> np.ndarray:
         """
-        施設のマッチングスコアを計算
+        候補施設のマッチングスコアをまとめて計算
 
         スコア = 距離スコア (50点) + キーワードマッチスコア (50点)
 
         Args:
-            facility: 施設データ
-            vibe_keywords: Vibeキーワードリスト
-            sensation_keywords: Sensationキーワードリスト
-            distance_km: ユーザーからの距離
+            table: 施設テーブル
+            positions: 候補施設の添字配列
+            vibe_keywords: Vibeキーワード集合
+            sensation_keywords: Sensationキーワード集合
+            distances: 候補施設ごとのユーザーからの距離
 
         Returns:
-            スコア（0-100）
+            スコア（0-100）の配列
         """
         # 1. 距離スコア（50点満点）
-        # 0-10km: 50点
-        # 10-30km: 30点
-        # 30-50km: 10点
-        if distance_km <= 10:
-            distance_score = 50.0
-        elif distance_km <= 30:
-            distance_score = 50.0 - ((distance_km - 10) / 20) * 20  # 50 → 30
-        else:
-            distance_score = 30.0 - ((distance_km - 30) / 20) * 20  # 30 → 10
-
-        distance_score = max(0, distance_score)
+        distance_scores = distance_score(distances)
 
         # 2. キーワードマッチスコア（50点満点）
-        facility_keywords = facility.get("keywords", [])
-        if not facility_keywords:
-            facility_keywords = []
-
         # Vibeマッチ（30点）
-        vibe_match_count = sum(
-            1 for keyword in vibe_keywords if keyword in facility_keywords
-        )
+        vibe_match_count = table.count_matches(positions, vibe_keywords, self.match_backend)
         vibe_score = (vibe_match_count / len(vibe_keywords)) * 30 if vibe_keywords else 0
 
         # Sensationマッチ（20点）
-        sensation_match_count = sum(
-            1 for keyword in sensation_keywords if keyword in facility_keywords
+        sensation_match_count = table.count_matches(
+            positions, sensation_keywords, self.match_backend
         )
         sensation_score = (
             (sensation_match_count / len(sensation_keywords)) * 20 if sensation_keywords else 0
@@ -141,9 +158,32 @@ class SearchEngine:
         keyword_score = vibe_score + sensation_score
 
         # 合計スコア
-        total_score = distance_score + keyword_score
+        total_score = distance_scores + keyword_score
+
+        return round_array(total_score, 2)
+
+    def _select_top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        スコア上位k件の添字を取得（全件ソートせずargpartitionで選択）
+
+        同点の場合は候補の並び順（距離順）を優先する
+
+        Args:
+            scores: スコア配列
+            k: 取得件数
+
+        Returns:
+            スコアの降順に並んだ添字配列
+        """
+        if len(scores) > k:
+            # k番目のスコア以上の候補だけに絞ってからソート
+            kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            candidates = np.flatnonzero(scores >= kth_score)
+        else:
+            candidates = np.arange(len(scores))
 
-        return round(total_score, 2)
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:k]
 
 
 # シングルトンインスタンス
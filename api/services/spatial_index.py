@@ -0,0 +1,86 @@
+"""
+空間インデックス（一様グリッド）
+施設を緯度経度のセルに振り分け、半径検索の候補を近傍セルだけに絞り込む
+"""
+import math
+from collections import defaultdict
+from typing import List, Dict, Tuple
+import numpy as np
+from api.services.distance_calculator import (
+    KM_PER_DEGREE,
+    bounding_box_deltas,
+    haversine_distances,
+)
+
+
+class GridIndex:
+    """
+    一様グリッドによる半径検索
+
+    - セルサイズ: cell_km（緯度方向の距離、経度方向も同じ度数で分割）
+    - 検索: 矩形範囲に重なるセルだけを走査し、Haversineで厳密に判定
+    - 結果: 半径内の施設のみを距離の昇順で返す
+    """
+
+    def __init__(self, cell_km: float = 10.0):
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        self._lats = np.empty(0, dtype=np.float64)
+        self._lngs = np.empty(0, dtype=np.float64)
+
+    def _cell_of(self, lat: float, lng: float) -> Tuple[int, int]:
+        """緯度経度が属するセル"""
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def build(self, lats: np.ndarray, lngs: np.ndarray) -> None:
+        """
+        インデックス構築
+
+        Args:
+            lats: 緯度配列（位置が施設の添字になる）
+            lngs: 経度配列
+        """
+        cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for position, (lat, lng) in enumerate(zip(lats.tolist(), lngs.tolist())):
+            cells[self._cell_of(lat, lng)].append(position)
+
+        self._cells = {cell: np.array(positions, dtype=np.intp) for cell, positions in cells.items()}
+        self._lats = lats
+        self._lngs = lngs
+
+    def query(self, lat: float, lng: float, max_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        半径内の施設を距離順に取得
+
+        Args:
+            lat: 中心の緯度
+            lng: 中心の経度
+            max_km: 半径（km）
+
+        Returns:
+            (施設の添字配列, 距離km配列)（距離の昇順）
+        """
+        lat_delta, lng_delta = bounding_box_deltas(lat, max_km)
+        min_row, min_col = self._cell_of(lat - lat_delta, lng - lng_delta)
+        max_row, max_col = self._cell_of(lat + lat_delta, lng + lng_delta)
+
+        chunks = [
+            self._cells[(row, col)]
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+            if (row, col) in self._cells
+        ]
+        if not chunks:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+
+        positions = np.concatenate(chunks)
+        distances = haversine_distances(lat, lng, self._lats[positions], self._lngs[positions])
+
+        within = distances <= max_km
+        positions, distances = positions[within], distances[within]
+
+        order = np.lexsort((positions, distances))
+        return positions[order], distances[order]
+
+    def __len__(self) -> int:
+        return len(self._lats)
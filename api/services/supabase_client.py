@@ -1,19 +1,21 @@
 """
 Supabaseクライアントサービス
 """
-from typing import List, Optional, Dict, Any
-from supabase import create_client, Client
-from api.core.config import settings
+from typing import List, Optional, Dict, Any, Tuple
+from postgrest import AsyncPostgrestClient
+from postgrest.types import ReturnMethod
+from api.core.clients import create_postgrest_client
 
 
 class SupabaseService:
-    """Supabase操作サービス"""
+    """
+    Supabase操作サービス
+
+    PostgRESTの非同期クライアントを使用（接続プールはキャッシュサービスと共有）
+    """
 
     def __init__(self):
-        self.client: Client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_ROLE_KEY,
-        )
+        self.client: AsyncPostgrestClient = create_postgrest_client()
 
     async def search_onsen_by_location_and_keywords(
         self,
@@ -26,34 +28,28 @@ class SupabaseService:
         """
         位置情報とキーワードで温泉施設を検索
 
+        search_onsen_nearby関数（04_create_search_onsen_nearby.sql）で
+        半径内の施設のみを距離の昇順で取得する
+
         Args:
             lat: ユーザーの緯度
             lng: ユーザーの経度
             keywords: 検索キーワードリスト
             max_distance_km: 最大距離（km）
-            limit: 取得件数上限
+            limit: 取得件数上限（近い順）
 
         Returns:
-            施設リスト
+            施設リスト（距離の昇順）
         """
-        # 簡易的な矩形範囲フィルタ（50km ≈ 緯度経度0.45度）
-        # 厳密な距離計算はアプリケーション側で行う
-        lat_delta = 0.45
-        lng_delta = 0.45
-
-        # Supabaseクエリ構築
-        query = (
-            self.client.table("onsen_master")
-            .select("*")
-            .gte("lat", lat - lat_delta)
-            .lte("lat", lat + lat_delta)
-            .gte("lng", lng - lng_delta)
-            .lte("lng", lng + lng_delta)
-            .limit(limit)
-        )
-
-        # クエリ実行
-        response = query.execute()
+        response = await self.client.rpc(
+            "search_onsen_nearby",
+            {
+                "p_lat": lat,
+                "p_lng": lng,
+                "p_radius_km": max_distance_km,
+                "p_limit": limit,
+            },
+        ).execute()
 
         return response.data if response.data else []
 
@@ -67,10 +63,63 @@ class SupabaseService:
         Returns:
             施設リスト
         """
-        response = self.client.table("onsen_master").select("*").limit(limit).execute()
+        response = await self.client.table("onsen_master").select("*").limit(limit).execute()
 
         return response.data if response.data else []
 
+    async def fetch_all_onsen(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        全温泉施設をページングしながら取得（施設インデックス構築用）
+
+        Args:
+            page_size: 1リクエストあたりの取得件数
+
+        Returns:
+            施設リスト（ID順）
+        """
+        return await self._fetch_all("onsen_master", "*", ["id"], page_size)
+
+    async def _fetch_all(
+        self, table: str, columns: str, order: List[str], page_size: int
+    ) -> List[Dict[str, Any]]:
+        """テーブルを主キー順にページングしながら全件取得"""
+        rows: List[Dict[str, Any]] = []
+        start = 0
+
+        while True:
+            query = self.client.table(table).select(columns)
+            for column in order:
+                query = query.order(column)
+            response = await query.range(start, start + page_size - 1).execute()
+            page = response.data if response.data else []
+            rows.extend(page)
+
+            if len(page) < page_size:
+                break
+            start += page_size
+
+        return rows
+
+    async def get_onsen_version(self) -> Tuple[int, Optional[str]]:
+        """
+        onsen_masterの更新検知用バージョンを取得
+
+        件数と最新のupdated_atの組み合わせで変更（追加・更新・削除）を検知する
+
+        Returns:
+            (施設件数, 最新のupdated_at)
+        """
+        response = await (
+            self.client.table("onsen_master")
+            .select("updated_at", count="exact")
+            .order("updated_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+
+        latest = response.data[0]["updated_at"] if response.data else None
+        return response.count or 0, latest
+
     async def get_onsen_by_id(self, onsen_id: int) -> Optional[Dict[str, Any]]:
         """
         IDで温泉施設を取得
@@ -81,12 +130,66 @@ class SupabaseService:
         Returns:
             施設データ または None
         """
-        response = self.client.table("onsen_master").select("*").eq("id", onsen_id).execute()
+        response = await (
+            self.client.table("onsen_master").select("*").eq("id", onsen_id).execute()
+        )
 
         if response.data and len(response.data) > 0:
             return response.data[0]
         return None
 
+    async def fetch_precomputed_catchphrases(
+        self, columns: str = "facility_id,mood_signature,catchphrase", page_size: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        事前生成済みキャッチフレーズを全件取得（05_create_catchphrase_precomputed.sql）
+
+        Args:
+            columns: 取得カラム
+            page_size: 1リクエストあたりの取得件数
+
+        Returns:
+            キャッチフレーズ行のリスト
+        """
+        return await self._fetch_all(
+            "catchphrase_precomputed", columns, ["facility_id", "mood_signature"], page_size
+        )
+
+    async def get_precomputed_catchphrase_version(self) -> Tuple[int, Optional[str]]:
+        """
+        事前生成キャッチフレーズの更新検知用バージョンを取得
+
+        Returns:
+            (件数, 最新のcreated_at)
+        """
+        response = await (
+            self.client.table("catchphrase_precomputed")
+            .select("created_at", count="exact")
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+
+        latest = response.data[0]["created_at"] if response.data else None
+        return response.count or 0, latest
+
+    async def upsert_precomputed_catchphrases(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        事前生成キャッチフレーズを一括保存（同じ施設 × 気分は上書き）
+
+        Args:
+            rows: facility_id, mood_signature, catchphrase, model を含む行
+        """
+        await (
+            self.client.table("catchphrase_precomputed")
+            .upsert(rows, on_conflict="facility_id,mood_signature", returning=ReturnMethod.minimal)
+            .execute()
+        )
+
+    async def close(self) -> None:
+        """接続プールを閉じる"""
+        await self.client.aclose()
+
 
 # シングルトンインスタンス
 supabase_service = SupabaseService()
@@ -0,0 +1,88 @@
+"""
+テスト共通設定
+
+- 外部サービスの認証情報はダミー値（実際には接続しない）
+- Redisはスライディングウィンドウのスクリプトと同じ判定をするインメモリ実装に差し替える
+- 時刻は FakeClock で進める（time.time / time.monotonic を差し替え）
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test")
+os.environ.setdefault("UPSTASH_REDIS_REST_URL", "https://test.upstash.io")
+os.environ.setdefault("UPSTASH_REDIS_REST_TOKEN", "test")
+
+import time  # noqa: E402
+from typing import Any, Dict, List, Tuple  # noqa: E402
+import pytest  # noqa: E402
+import api.core.clients as clients  # noqa: E402
+
+
+class FakeRedis:
+    """SLIDING_WINDOW_SCRIPT と同じ判定をするインメモリRedis（プロセス間で共有されるストアの代わり）"""
+
+    def __init__(self):
+        # key -> [(score, member)]
+        self.sets: Dict[str, List[Tuple[int, str]]] = {}
+        self.fail = False
+
+    def register_script(self, script: str):
+        async def run(keys: List[str], args: List[Any]) -> List[int]:
+            if self.fail:
+                raise ConnectionError("redis unavailable")
+            key = keys[0]
+            now, window, limit, member = int(args[0]), int(args[1]), int(args[2]), args[3]
+
+            entries = [entry for entry in self.sets.get(key, []) if entry[0] > now - window]
+            self.sets[key] = entries
+            if len(entries) >= limit:
+                return [0, 0, min(score for score, _ in entries) + window - now]
+
+            entries.append((now, member))
+            return [1, limit - len(entries), window]
+
+        return run
+
+    async def delete(self, key: str) -> int:
+        return 1 if self.sets.pop(key, None) is not None else 0
+
+    async def aclose(self) -> None:
+        pass
+
+
+fake_redis = FakeRedis()
+
+# rate_limiter のシングルトン生成前に差し替える
+clients.create_redis_client = lambda: fake_redis
+
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(time, "time", fake.time)
+    monkeypatch.setattr(time, "monotonic", fake.monotonic)
+    return fake
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    fake_redis.sets.clear()
+    fake_redis.fail = False
+    return fake_redis
@@ -0,0 +1,104 @@
+"""
+検索結果キャッシュのテスト
+"""
+import asyncio
+from api.services.cache_service import CacheService
+from api.services.distance_calculator import haversine_distance
+from api.services.search_engine import distance_score
+
+
+def search_params(lat: float, lng: float) -> dict:
+    return {
+        "vibes": ["forest", "snow", "hinoki"],
+        "sensations": ["トロトロ"],
+        "location": {"lat": lat, "lng": lng},
+    }
+
+
+def facility(facility_id: int, lat: float, lng: float, origin: dict, keyword_score: float) -> dict:
+    """originから検索したときの結果の施設"""
+    distance_km = haversine_distance(origin["location"]["lat"], origin["location"]["lng"], lat, lng)
+    return {
+        "id": facility_id,
+        "name": f"施設{facility_id}",
+        "address": "東京都",
+        "lat": lat,
+        "lng": lng,
+        "price": 800,
+        "distance_km": distance_km,
+        "catchphrase": "森の湯",
+        "score": round(keyword_score + float(distance_score(distance_km)), 2),
+    }
+
+
+def test_hit_recomputes_distance_and_score_for_request_location():
+    """同じセルの別の位置からのヒットは、その位置からの距離・スコアを返す"""
+    cache = CacheService()
+    cache.quantizer.mode = "round2"
+
+    first = search_params(35.6812, 139.7671)
+    result = {
+        "facilities": [
+            facility(1, 35.7800, 139.7671, first, keyword_score=20.0),  # 約11km
+            facility(2, 35.6000, 139.7671, first, keyword_score=20.0),  # 約9km
+        ],
+        "cached": False,
+        "search_params": first,
+    }
+    cache.enqueue_set(first, result)
+
+    # 同じセル（小数点第2位）の別の位置
+    second = search_params(35.6849, 139.7710)
+    cached = asyncio.run(cache.get(second))
+    assert cached is not None
+
+    facilities = {f["id"]: f for f in cached.result["facilities"]}
+    for facility_id, f in facilities.items():
+        expected = haversine_distance(35.6849, 139.7710, f["lat"], f["lng"])
+        assert f["distance_km"] == expected
+        assert f["score"] == round(20.0 + float(distance_score(expected)), 2)
+
+    assert [f["score"] for f in cached.result["facilities"]] == sorted(
+        (f["score"] for f in cached.result["facilities"]), reverse=True
+    )
+    assert cached.result["search_params"] == second
+
+
+class StubFacilityIndex:
+    """施設インデックスの代わり（指定した施設の位置だけを持つ）"""
+
+    is_ready = True
+    loaded_at = 1.0
+
+    def __init__(self, positions):
+        self.positions = positions
+
+    def count_nearby(self, lat: float, lng: float, max_distance_km: float) -> int:
+        return sum(
+            1 for p_lat, p_lng in self.positions
+            if haversine_distance(lat, lng, p_lat, p_lng) <= max_distance_km
+        )
+
+
+def test_empty_area_not_recorded_when_cell_reaches_a_facility():
+    """セル内の別の位置からは施設が半径内にある場合、施設なしエリアとして記録しない"""
+    cache = CacheService()
+    cache.quantizer.mode = "round2"
+
+    # 検索位置からは50kmより少し遠いが、同じセルの東端からは50km以内の施設
+    origin = search_params(35.6800, 139.7700)
+    cache.facilities = StubFacilityIndex([(35.6800, 139.7700 + 50.2 / 90.3)])
+    assert haversine_distance(35.68, 139.77, *cache.facilities.positions[0]) > 50.0
+
+    assert not cache.set_empty_area(origin, max_distance_km=50.0)
+    assert not cache.is_empty_area(search_params(35.6849, 139.7749))
+
+
+def test_empty_area_recorded_when_whole_cell_is_empty():
+    """セル内のどこからも施設が半径外なら記録し、同じセルの別の位置もヒットする"""
+    cache = CacheService()
+    cache.quantizer.mode = "round2"
+    cache.facilities = StubFacilityIndex([(35.6800, 139.7700 + 52.0 / 90.3)])
+
+    assert cache.set_empty_area(search_params(35.6800, 139.7700), max_distance_km=50.0)
+    assert cache.is_empty_area(search_params(35.6849, 139.7749))
@@ -0,0 +1,85 @@
+"""
+レート制限のテスト
+"""
+import asyncio
+from api.services.rate_limiter import RateLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def exhaust(limiter: RateLimiter, identifier: str, clock, interval: float) -> None:
+    """上限まで許可されるリクエストをinterval秒おきに送る"""
+    for i in range(limiter.max_requests):
+        if i:
+            clock.advance(interval)
+        allowed, _, _ = run(limiter.check_rate_limit(identifier))
+        assert allowed
+
+
+def test_local_rejection_reports_redis_reset(clock, redis):
+    """ローカルで拒否したときのリセット秒数がRedisの判定と一致する"""
+    limiter = RateLimiter()
+    limiter.rejections = None  # ローカルフィルタの経路だけを通す
+    exhaust(limiter, "1.2.3.4", clock, interval=600)
+    clock.advance(10)
+
+    allowed, remaining, reset_seconds = run(limiter.check_rate_limit("1.2.3.4"))
+    assert (allowed, remaining) == (False, 0)
+    assert limiter.local_rejections == 1
+    assert limiter.redis_checks == limiter.max_requests
+
+    # 同じ時刻にRedisへ問い合わせた結果（ローカルの状態を持たないインスタンス）
+    other = RateLimiter()
+    assert run(other.check_rate_limit("1.2.3.4")) == (False, 0, reset_seconds)
+    # 最も古いリクエストがウィンドウから外れるまで（トークン1個の回復時間ではない）
+    assert reset_seconds == limiter.window_seconds - (limiter.max_requests - 1) * 600 - 10
+
+
+def test_local_rejection_is_cached_until_reset(clock, redis):
+    """ローカルで拒否したらリセットまで拒否キャッシュから同じリセット時刻を返す"""
+    limiter = RateLimiter()
+    exhaust(limiter, "1.2.3.4", clock, interval=60)
+
+    _, _, reset_seconds = run(limiter.check_rate_limit("1.2.3.4"))
+    clock.advance(30)
+    assert run(limiter.check_rate_limit("1.2.3.4")) == (False, 0, reset_seconds - 30)
+    assert limiter.cached_rejections == 1
+
+    clock.advance(reset_seconds - 30)
+    allowed, _, _ = run(limiter.check_rate_limit("1.2.3.4"))
+    assert allowed
+
+
+def test_reset_clears_local_state(clock, redis):
+    """リセット後はローカルの状態でも拒否しない"""
+    limiter = RateLimiter()
+    exhaust(limiter, "1.2.3.4", clock, interval=1)
+    allowed, _, _ = run(limiter.check_rate_limit("1.2.3.4"))
+    assert not allowed
+
+    assert run(limiter.reset("1.2.3.4"))
+    allowed, _, _ = run(limiter.check_rate_limit("1.2.3.4"))
+    assert allowed
+
+
+def test_reset_reaches_other_workers_within_trust_period(clock, redis):
+    """別のワーカーでのリセットは信頼期間内に反映される（ローカルの拒否を使い続けない）"""
+    worker_a = RateLimiter()
+    worker_b = RateLimiter()
+    exhaust(worker_a, "1.2.3.4", clock, interval=1)
+
+    # どちらのワーカーもローカルで拒否できる状態
+    assert not run(worker_a.check_rate_limit("1.2.3.4"))[0]
+    assert not run(worker_b.check_rate_limit("1.2.3.4"))[0]
+
+    assert run(worker_b.reset("1.2.3.4"))
+    assert run(worker_b.check_rate_limit("1.2.3.4"))[0]
+
+    # ワーカーAは信頼期間を過ぎたらRedisで確かめ直し、ローカルの状態を破棄する
+    clock.advance(worker_a.confirmed.ttl_seconds)
+    allowed, remaining, _ = run(worker_a.check_rate_limit("1.2.3.4"))
+    assert allowed
+    assert remaining == worker_a.max_requests - 2
+    assert worker_a.local_filter.retry_after("1.2.3.4") is None
@@ -0,0 +1,134 @@
+"""
+バックグラウンド一括書き込み
+
+書き込みを上限付きキューに積み、ライタータスクがまとめて書き出す
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class BatchWriter:
+    """
+    上限付きキュー + バッチ書き込み
+
+    - submit: キューに積むだけで即座に戻る（満杯なら破棄してカウント）
+    - ライタータスク: 最大batch_size件、最大linger_seconds待ってまとめて書き込み
+    - stop: キューに残った分を書き出してから終了
+      （停止時に書き込み中だったバッチは再送するため、writeは冪等であること）
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Any]], Awaitable[None]],
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        linger_seconds: float = 0.5,
+        name: str = "batch_writer",
+    ):
+        self.write = write
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.name = name
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[Any] = []
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+    def submit(self, item: Any) -> bool:
+        """
+        書き込みをキューに積む
+
+        Args:
+            item: 書き込むデータ
+
+        Returns:
+            積めたらTrue（キュー満杯で破棄したらFalse）
+        """
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    def start(self) -> None:
+        """ライタータスクを開始"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """ライタータスクを停止し、残りを書き出す"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        pending, self._pending = self._pending, []
+        await self._flush(pending)
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    def _drain(self, limit: int) -> List[Any]:
+        """キューから待たずに取り出せる分を取り出す"""
+        items = []
+        while len(items) < limit and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _run(self) -> None:
+        """キューを監視してまとめて書き込む"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            try:
+                # 最大linger_secondsだけ待って、バッチを埋める
+                deadline = loop.time() + self.linger_seconds
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._flush(batch)
+            except asyncio.CancelledError:
+                # 収集済み・書き込み中のバッチは停止時に書き出す
+                self._pending.extend(batch)
+                raise
+
+    async def _flush(self, batch: List[Any]) -> None:
+        """1バッチを書き込む（失敗してもライターは止めない）"""
+        if not batch:
+            return
+        try:
+            await self.write(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"⚠️  {self.name} 書き込みエラー: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """書き込みの統計情報"""
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
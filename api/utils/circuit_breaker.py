@@ -0,0 +1,85 @@
+"""
+サーキットブレーカー
+
+外部サービスの連続失敗を検知し、一定時間呼び出しを止めてフォールバックさせる
+"""
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitBreaker:
+    """
+    closed → open → half_open → closed の3状態
+
+    - closed: 通常どおり呼び出す。failure_threshold 回連続で失敗したら open
+    - open: cooldown_seconds の間は呼び出さない（フォールバック）
+    - half_open: cooldown 経過後、試行を1件だけ通す。成功で closed、失敗で再び open
+      （試行の結果が cooldown_seconds 以上返らない場合は次の試行を通す）
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+
+        # 状態遷移の回数
+        self.transitions = {self.OPEN: 0, self.HALF_OPEN: 0, self.CLOSED: 0}
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self.transitions[state] += 1
+
+    def allow_request(self) -> bool:
+        """
+        呼び出してよいか
+
+        Returns:
+            呼び出すならTrue（half_open中の試行1件を含む）
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                return False
+            self._transition(self.HALF_OPEN)
+
+        # half_open: 試行は同時に1件だけ
+        now = time.monotonic()
+        if self._trial_started_at is not None and now - self._trial_started_at < self.cooldown_seconds:
+            return False
+        self._trial_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        """呼び出し成功"""
+        self.consecutive_failures = 0
+        self._trial_started_at = None
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """呼び出し失敗"""
+        self.consecutive_failures += 1
+        self._trial_started_at = None
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        """ブレーカーの状態"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "transitions": dict(self.transitions),
+        }
@@ -0,0 +1,118 @@
+"""
+Geohash（位置の空間量子化）
+
+キャッシュキーの位置情報を、近いユーザー同士で同じ値になるセルに丸めるために使う
+"""
+import math
+from typing import Tuple
+from api.services.distance_calculator import EARTH_RADIUS_KM
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(lat: float, lng: float, precision: int) -> str:
+    """
+    緯度経度をGeohashに変換
+
+    Args:
+        lat: 緯度
+        lng: 経度
+        precision: 文字数（1〜12）
+
+    Returns:
+        Geohash文字列
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # 偶数ビットは経度
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_range[0] = mid
+            else:
+                value <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Geohashセルの範囲
+
+    Args:
+        geohash: Geohash文字列
+
+    Returns:
+        (最小緯度, 最大緯度, 最小経度, 最大経度)
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def center(geohash: str) -> Tuple[float, float]:
+    """
+    Geohashセルの中心
+
+    Returns:
+        (緯度, 経度)
+    """
+    lat_min, lat_max, lng_min, lng_max = bounds(geohash)
+    return (lat_min + lat_max) / 2, (lng_min + lng_max) / 2
+
+
+def cell_size_km(precision: int, lat: float = 35.0) -> Tuple[float, float]:
+    """
+    指定精度のセルの大きさ（目安）
+
+    Args:
+        precision: 文字数
+        lat: 経度方向の長さを計算する緯度
+
+    Returns:
+        (南北km, 東西km)
+    """
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+    return (
+        180 / 2**lat_bits * km_per_degree,
+        360 / 2**lng_bits * km_per_degree * math.cos(math.radians(lat)),
+    )
@@ -0,0 +1,83 @@
+"""
+キーワード語彙（キーワード → ビット位置）
+
+施設キーワードとVibe/Sensationキーワードを共通のIDに変換し、
+uint64配列のビットマスクとして扱うためのユーティリティ
+"""
+from typing import Dict, Iterable, Optional
+import numpy as np
+from api.utils.vibe_mapping import KEYWORD_IDS
+
+
+# 1バイトごとの立っているビット数（popcount用の表）
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class KeywordVocabulary:
+    """
+    キーワード語彙
+
+    - Vibe/Sensationキーワードは vibe_mapping.KEYWORD_IDS と同じIDを使う
+    - 施設データにしか出てこないキーワードは後から追加（intern）
+    """
+
+    def __init__(self, base_keywords: Iterable[str]):
+        self._ids: Dict[str, int] = {}
+        for keyword in base_keywords:
+            self.intern(keyword)
+
+    def intern(self, keyword: str) -> int:
+        """キーワードのIDを取得（未登録なら追加）"""
+        return self._ids.setdefault(keyword, len(self._ids))
+
+    def id_of(self, keyword: str) -> Optional[int]:
+        """キーワードのIDを取得（未登録ならNone）"""
+        return self._ids.get(keyword)
+
+    def word_count(self) -> int:
+        """現在の語彙を表すのに必要なuint64の個数"""
+        return max(1, (len(self._ids) + 63) // 64)
+
+    def encode(self, keywords: Iterable[str], words: int) -> np.ndarray:
+        """
+        キーワードリストをビットマスクに変換
+
+        未登録のキーワードや words に収まらないIDは無視する
+        （そのキーワードを持つ施設が存在しないため、マッチ数に影響しない）
+
+        Args:
+            keywords: キーワードリスト
+            words: マスクのuint64個数
+
+        Returns:
+            uint64配列（長さwords）
+        """
+        mask = np.zeros(words, dtype=np.uint64)
+        for keyword in keywords:
+            keyword_id = self._ids.get(keyword)
+            if keyword_id is not None and keyword_id < words * 64:
+                mask[keyword_id // 64] |= np.uint64(1 << (keyword_id % 64))
+        return mask
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def popcount_rows(masks: np.ndarray) -> np.ndarray:
+    """
+    uint64マスク行列の行ごとの立っているビット数
+
+    Args:
+        masks: uint64の2次元配列（行 × ワード）
+
+    Returns:
+        行ごとのビット数
+    """
+    if masks.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    as_bytes = np.ascontiguousarray(masks).view(np.uint8).reshape(masks.shape[0], -1)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+# シングルトンインスタンス（KEYWORD_IDSはID順に並んでいる）
+keyword_vocabulary = KeywordVocabulary(KEYWORD_IDS)
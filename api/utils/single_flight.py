@@ -0,0 +1,85 @@
+"""
+リクエスト合流（single-flight）
+
+同じキーの処理が実行中なら、新たに実行せず実行中の結果を共有する
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    キーごとに同時実行を1つにまとめる
+
+    - 最初の呼び出し（リーダー）が処理をタスクとして開始
+    - 実行中に来た同じキーの呼び出しはそのタスクの完了を待つ
+    - 処理はタスクとして独立しているため、リーダーがキャンセルされても他の待機者には影響しない
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        キーに対する処理を実行（実行中なら合流）
+
+        Args:
+            key: 合流キー
+            fn: 処理（コルーチンを返す関数）
+
+        Returns:
+            (結果, 合流したか)
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.executions += 1
+        task.add_done_callback(lambda t: self._finish(key, t))
+
+        return await asyncio.shield(task), False
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        キーに対する処理をバックグラウンドで開始（実行中なら何もしない）
+
+        Args:
+            key: 合流キー
+            fn: 処理（コルーチンを返す関数）
+
+        Returns:
+            新たに開始したらTrue
+        """
+        if key in self._inflight:
+            self.coalesced += 1
+            return False
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self.executions += 1
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return True
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """完了したタスクを登録解除"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 待機者が全員キャンセルされた場合の「未取得の例外」警告を防ぐ
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """合流の統計情報"""
+        return {
+            "inflight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,99 @@
+"""
+プロセス内スライディングウィンドウ（上限付きLRU）
+
+共有ストア（Redis）が使えない間のレート制限フォールバック用
+"""
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, Optional, Tuple
+
+
+class LocalSlidingWindow:
+    """
+    キーごとに直近 window_seconds 内のリクエスト時刻を最大 max_requests 件保持
+
+    - check: 判定して、許可なら記録
+    - record: 外部で許可されたリクエストを記録（障害時に直近の履歴を引き継ぐため）
+    - このプロセスで見たリクエストのみで判定する（複数ワーカー間では近似）
+    """
+
+    def __init__(self, max_requests: int, window_seconds: float, max_entries: int = 10000):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+
+        self._windows: "OrderedDict[Hashable, Deque[float]]" = OrderedDict()
+
+    def _window(self, key: Hashable, now: float) -> Deque[float]:
+        """キーのウィンドウ（期限切れを削除済み）"""
+        window = self._windows.get(key)
+        if window is None:
+            window = deque(maxlen=self.max_requests)
+            self._windows[key] = window
+            while len(self._windows) > self.max_entries:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+
+        while window and window[0] <= now - self.window_seconds:
+            window.popleft()
+        return window
+
+    def check(self, key: Hashable) -> Tuple[bool, int, int]:
+        """
+        レート制限チェック（許可したら記録）
+
+        Args:
+            key: 識別子
+
+        Returns:
+            (許可するか, 残りリクエスト数, リセットまでの秒数)
+        """
+        now = time.monotonic()
+        window = self._window(key, now)
+
+        if len(window) >= self.max_requests:
+            reset_seconds = math.ceil(window[0] + self.window_seconds - now)
+            return False, 0, max(0, reset_seconds)
+
+        window.append(now)
+        return True, self.max_requests - len(window), int(self.window_seconds)
+
+    def record(self, key: Hashable) -> None:
+        """
+        外部で許可されたリクエストを記録
+
+        Args:
+            key: 識別子
+        """
+        now = time.monotonic()
+        self._window(key, now).append(now)
+
+    def reset_seconds(self, key: Hashable) -> Optional[int]:
+        """
+        上限に達している場合、最も古いリクエストがウィンドウから外れるまでの秒数
+
+        Args:
+            key: 識別子
+
+        Returns:
+            リセットまでの秒数（上限未満ならNone）
+        """
+        now = time.monotonic()
+        window = self._window(key, now)
+        if len(window) < self.max_requests:
+            return None
+        return max(1, math.ceil(window[0] + self.window_seconds - now))
+
+    def discard(self, key: Hashable) -> None:
+        """
+        キーの履歴を削除
+
+        Args:
+            key: 識別子
+        """
+        self._windows.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._windows)
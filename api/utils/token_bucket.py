@@ -0,0 +1,89 @@
+"""
+キー単位のトークンバケット（上限付きLRU）
+
+レート制限の前段フィルタ用。ローカルで確実に上限超過と言えるクライアントだけを弾く
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TokenBucketFilter:
+    """
+    トークンバケット（容量 capacity、window_seconds で capacity 個回復）
+
+    - consume: 許可されたリクエスト（共有ストアに記録されたもの）だけを消費する
+    - retry_after: トークンが1個未満なら回復までの秒数、あれば None
+    - バケットが空 ⇒ 直近 window_seconds 内にこのプロセスだけで capacity 件以上記録済み
+      ⇒ 共有ストアのスライディングウィンドウでも必ず上限超過（他プロセス分は増えるだけ）
+    - 上限件数を超えたら最も古いキーから破棄（破棄しても共有ストアに問い合わせるだけ）
+    """
+
+    def __init__(self, capacity: int, window_seconds: float, max_entries: int = 10000):
+        self.capacity = float(capacity)
+        self.rate = capacity / window_seconds  # 1秒あたりの回復量
+        self.max_entries = max_entries
+
+        # key -> (トークン数, 最終更新時刻)
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+        self.evictions = 0
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        """現在のトークン数（未登録なら満タン）"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.capacity
+        tokens, updated_at = bucket
+        return min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+    def retry_after(self, key: Hashable) -> Optional[float]:
+        """
+        ローカルで上限超過が確定しているか
+
+        Args:
+            key: 識別子
+
+        Returns:
+            トークンが回復するまでの秒数（上限超過時）または None
+        """
+        tokens = self._tokens(key, time.monotonic())
+        if tokens >= 1:
+            return None
+        return (1 - tokens) / self.rate
+
+    def consume(self, key: Hashable) -> None:
+        """
+        トークンを1個消費（共有ストアで許可されたリクエストに対して呼ぶ）
+
+        Args:
+            key: 識別子
+        """
+        now = time.monotonic()
+        tokens = self._tokens(key, now)
+        self._buckets[key] = (max(0.0, tokens - 1), now)
+        self._buckets.move_to_end(key)
+
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """
+        キーのバケットを削除（次回は満タンから）
+
+        Args:
+            key: 識別子
+        """
+        self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> Dict[str, Any]:
+        """バケットの統計情報"""
+        return {
+            "tracked": len(self._buckets),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
@@ -3,6 +3,11 @@ Vibe/Sensation → キーワードマッピング
 
 ルールベース検索のためのキーワード辞書
 """
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+import numpy as np
 
 # Vibeキーワードマッピング
 VIBE_KEYWORDS = {
@@ -231,6 +236,88 @@ SENSATION_KEYWORDS = {
 }
 
 
+# キーワードID（Vibe → Sensationの定義順に固定で割り当て）
+KEYWORD_IDS: Dict[str, int] = {}
+for _keywords in (*VIBE_KEYWORDS.values(), *SENSATION_KEYWORDS.values()):
+    for _keyword in _keywords:
+        KEYWORD_IDS.setdefault(_keyword, len(KEYWORD_IDS))
+
+
+@dataclass(frozen=True)
+class KeywordSet:
+    """
+    Vibe/Sensationの組み合わせに対応するキーワード集合（事前計算済み）
+
+    - keywords: キーワード（重複なし、定義順で固定）
+    - ids: キーワードID配列（KEYWORD_IDS）
+    - mask: キーワードIDのビットマスク（uint64配列）
+    """
+
+    keywords: Tuple[str, ...]
+    ids: np.ndarray
+    mask: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+
+def _build_keyword_set(selected: Iterable[str], mapping: Dict[str, List[str]]) -> KeywordSet:
+    """
+    選択肢に対応するKeywordSetを構築
+
+    キーワードの並びは選択順ではなくmappingの定義順で決める（プロセス間で再現可能）
+    """
+    keywords: Dict[str, None] = {}
+    for name, name_keywords in mapping.items():
+        if name in selected:
+            keywords.update(dict.fromkeys(name_keywords))
+
+    ids = np.array([KEYWORD_IDS[keyword] for keyword in keywords], dtype=np.int64)
+    mask = np.zeros(max(1, (len(KEYWORD_IDS) + 63) // 64), dtype=np.uint64)
+    for keyword_id in ids.tolist():
+        mask[keyword_id // 64] |= np.uint64(1 << (keyword_id % 64))
+
+    ids.setflags(write=False)
+    mask.setflags(write=False)
+    return KeywordSet(keywords=tuple(keywords), ids=ids, mask=mask)
+
+
+@lru_cache(maxsize=None)
+def _vibe_keyword_set(vibes: FrozenSet[str]) -> KeywordSet:
+    return _build_keyword_set(vibes, VIBE_KEYWORDS)
+
+
+@lru_cache(maxsize=None)
+def _sensation_keyword_set(sensations: FrozenSet[str]) -> KeywordSet:
+    return _build_keyword_set(sensations, SENSATION_KEYWORDS)
+
+
+def get_vibe_keyword_set(vibes: Iterable[str]) -> KeywordSet:
+    """
+    選択されたVibeに対応するKeywordSetを取得（組み合わせごとにメモ化）
+
+    Args:
+        vibes: Vibe選択肢（順序は問わない）
+
+    Returns:
+        KeywordSet
+    """
+    return _vibe_keyword_set(frozenset(vibes))
+
+
+def get_sensation_keyword_set(sensations: Iterable[str]) -> KeywordSet:
+    """
+    選択されたSensationに対応するKeywordSetを取得（組み合わせごとにメモ化）
+
+    Args:
+        sensations: Sensation選択肢（順序は問わない）
+
+    Returns:
+        KeywordSet
+    """
+    return _sensation_keyword_set(frozenset(sensations))
+
+
 def get_vibe_keywords(vibes: list[str]) -> list[str]:
     """
     選択されたVibeに対応するキーワードリストを取得
@@ -239,13 +326,9 @@ def get_vibe_keywords(vibes: list[str]) -> list[str]:
         vibes: Vibe選択肢のリスト（例: ["forest", "snow", "hinoki"]）
 
     Returns:
-        キーワードのリスト（重複なし）
+        キーワードのリスト（重複なし、定義順）
     """
-    keywords = []
-    for vibe in vibes:
-        if vibe in VIBE_KEYWORDS:
-            keywords.extend(VIBE_KEYWORDS[vibe])
-    return list(set(keywords))  # 重複削除
+    return list(get_vibe_keyword_set(vibes).keywords)
 
 
 def get_sensation_keywords(sensations: list[str]) -> list[str]:
@@ -256,10 +339,51 @@ def get_sensation_keywords(sensations: list[str]) -> list[str]:
         sensations: Sensation選択肢のリスト（例: ["トロトロ", "プンプン"]）
 
     Returns:
-        キーワードのリスト（重複なし）
+        キーワードのリスト（重複なし、定義順）
+    """
+    return list(get_sensation_keyword_set(sensations).keywords)
+
+
+def _dominant(selected: Iterable[str], mapping: Dict[str, List[str]], keywords: FrozenSet[str]) -> str:
+    """選択肢のうち施設キーワードとの一致数が最大のもの（同数はmappingの定義順で先のもの）"""
+    selected = set(selected)
+    best, best_hits = None, -1
+    for name, name_keywords in mapping.items():
+        if name not in selected:
+            continue
+        hits = sum(1 for keyword in name_keywords if keyword in keywords)
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
+
+
+def dominant_mood(
+    facility_keywords: Iterable[str], vibes: Iterable[str], sensations: Iterable[str]
+) -> Tuple[str, str]:
+    """
+    施設に対して支配的なVibe/Sensationを1つずつ選ぶ
+
+    キャッチフレーズの事前生成は施設 × (Vibe 1個, Sensation 1個) の組み合わせで行うため、
+    ユーザーの選択をこの組み合わせに縮約する
+
+    Args:
+        facility_keywords: 施設のキーワード
+        vibes: Vibe選択
+        sensations: Sensation選択
+
+    Returns:
+        (Vibe, Sensation)
     """
-    keywords = []
-    for sensation in sensations:
-        if sensation in SENSATION_KEYWORDS:
-            keywords.extend(SENSATION_KEYWORDS[sensation])
-    return list(set(keywords))  # 重複削除
+    keywords = frozenset(facility_keywords)
+    return (
+        _dominant(vibes, VIBE_KEYWORDS, keywords),
+        _dominant(sensations, SENSATION_KEYWORDS, keywords),
+    )
+
+
+# 有効な組み合わせ（Vibe 3個 × Sensation 1-4個）を起動時に事前計算
+for _vibes in combinations(VIBE_KEYWORDS, 3):
+    get_vibe_keyword_set(_vibes)
+for _size in range(1, 5):
+    for _sensations in combinations(SENSATION_KEYWORDS, _size):
+        get_sensation_keyword_set(_sensations)
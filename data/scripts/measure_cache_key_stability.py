@@ -0,0 +1,178 @@
+"""
+キャッシュキー安定性計測スクリプト
+Geohash精度ごとに「同じセル内の別の位置から検索しても上位3件が変わらない割合」を計測し、
+CACHE_GEOHASH_PRECISION / CACHE_GEOHASH_DENSE_PRECISION を決める材料にする
+
+使い方:
+1. .env.localにSupabase認証情報を設定
+2. リポジトリのルートで python data/scripts/measure_cache_key_stability.py を実行
+
+オプション:
+  --precisions 4,5,6,7   計測するGeohash精度
+  --cells 200            精度ごとにサンプリングするセル数
+  --points 10            セルごとにサンプリングする位置数
+  --seed 42              乱数シード
+
+計測方法:
+- 施設の周辺（最大20km）からランダムにセルを選び、セル内のランダムな位置で検索する
+- セル内の最初の位置の結果をキャッシュとみなし、他の位置の上位3件（順序込み）と一致する割合を安定性とする
+- 密集セル（現在の設定で細かい精度になるセル）とまばらなセルに分けて集計する
+- 「adaptive」は現在の設定（密度で精度を切り替え）での結果
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+from typing import Any, Dict, List, Tuple
+
+# リポジトリのルートからapiパッケージを読み込む
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from api.models.request import ALLOWED_SENSATIONS  # noqa: E402
+from api.services.facility_index import facility_index  # noqa: E402
+from api.services.location_quantizer import location_quantizer  # noqa: E402
+from api.services.search_engine import search_engine  # noqa: E402
+from api.services.supabase_client import supabase_service  # noqa: E402
+from api.utils import geohash  # noqa: E402
+from api.utils.vibe_mapping import VIBE_KEYWORDS  # noqa: E402
+
+# 施設からの最大オフセット（km）
+ANCHOR_SPREAD_KM = 20.0
+
+
+def random_mood(rng: random.Random) -> Tuple[List[str], List[str]]:
+    """ランダムな気分（Vibe 3個 × Sensation 1-2個）"""
+    vibes = rng.sample(list(VIBE_KEYWORDS), 3)
+    sensations = rng.sample(ALLOWED_SENSATIONS, rng.randint(1, 2))
+    return vibes, sensations
+
+
+def random_anchor(rng: random.Random, facilities: List[Dict[str, Any]]) -> Tuple[float, float]:
+    """施設の周辺のランダムな位置"""
+    facility = rng.choice(facilities)
+    distance = rng.uniform(0, ANCHOR_SPREAD_KM)
+    angle = rng.uniform(0, 2 * math.pi)
+    lat = facility["lat"] + distance * math.cos(angle) / 111.0
+    lng = facility["lng"] + distance * math.sin(angle) / (111.0 * math.cos(math.radians(facility["lat"])))
+    return lat, lng
+
+
+async def top_3(lat: float, lng: float, vibes: List[str], sensations: List[str]) -> List[int]:
+    """上位3件の施設ID"""
+    facilities = await search_engine.search(
+        vibes=vibes, sensations=sensations, user_lat=lat, user_lng=lng, max_distance_km=50.0
+    )
+    return [facility["id"] for facility in facilities[:3]]
+
+
+async def measure(
+    rng: random.Random,
+    facilities: List[Dict[str, Any]],
+    precision: Any,
+    cells: int,
+    points: int,
+) -> Dict[str, Dict[str, float]]:
+    """
+    1つの精度（または"adaptive"）の安定性を計測
+
+    Returns:
+        {"dense" | "sparse" | "all": {"cells", "pairs", "stable"}}
+    """
+    totals = {group: {"cells": 0, "pairs": 0, "stable": 0} for group in ("dense", "sparse", "all")}
+
+    for _ in range(cells):
+        lat, lng = random_anchor(rng, facilities)
+        if precision == "adaptive":
+            cell = location_quantizer.cell(lat, lng)
+        else:
+            cell = geohash.encode(lat, lng, precision)
+
+        coarse = geohash.encode(lat, lng, location_quantizer.precision)
+        dense = location_quantizer.precision_for(coarse) == location_quantizer.dense_precision
+        vibes, sensations = random_mood(rng)
+
+        lat_min, lat_max, lng_min, lng_max = geohash.bounds(cell)
+        results = []
+        for _ in range(points):
+            point_lat = rng.uniform(lat_min, lat_max)
+            point_lng = rng.uniform(lng_min, lng_max)
+            results.append(await top_3(point_lat, point_lng, vibes, sensations))
+
+        # 最初の位置の結果をキャッシュとみなす
+        if not results[0]:
+            continue
+        stable = sum(1 for result in results[1:] if result == results[0])
+
+        for group in ("dense" if dense else "sparse", "all"):
+            totals[group]["cells"] += 1
+            totals[group]["pairs"] += points - 1
+            totals[group]["stable"] += stable
+
+    return totals
+
+
+def format_rate(total: Dict[str, float]) -> str:
+    """安定性（%）とセル数"""
+    if not total["pairs"]:
+        return "       -       "
+    return f"{total['stable'] / total['pairs'] * 100:6.1f}% ({total['cells']:>4})"
+
+
+async def run(args: argparse.Namespace) -> None:
+    """計測のメイン処理"""
+    # 施設インデックスがロードした施設をそのまま使う（全件を二重に取得しない）
+    count = await facility_index.load()
+    facilities = facility_index.facilities
+    print(f"施設: {count} 件\n")
+
+    precisions: List[Any] = [int(p) for p in args.precisions.split(",") if p.strip()]
+    precisions.append("adaptive")
+
+    print(f"{'精度':>8} | {'セルの大きさ':>14} | {'全体':>15} | {'密集':>15} | {'まばら':>15}")
+    print("-" * 82)
+
+    for precision in precisions:
+        rng = random.Random(args.seed)
+        totals = await measure(rng, facilities, precision, args.cells, args.points)
+
+        if precision == "adaptive":
+            size = f"{location_quantizer.precision}/{location_quantizer.dense_precision}"
+        else:
+            height, width = geohash.cell_size_km(precision)
+            size = f"{height:.1f}×{width:.1f}km"
+
+        print(
+            f"{str(precision):>8} | {size:>14} | {format_rate(totals['all'])} | "
+            f"{format_rate(totals['dense'])} | {format_rate(totals['sparse'])}"
+        )
+
+    print("\n安定性: 同じセル内の別の位置でも上位3件（順序込み）が一致した割合（括弧内はセル数）")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="キャッシュキー安定性計測")
+    parser.add_argument("--precisions", default="4,5,6,7", help="計測するGeohash精度（カンマ区切り）")
+    parser.add_argument("--cells", type=int, default=200, help="精度ごとにサンプリングするセル数")
+    parser.add_argument("--points", type=int, default=10, help="セルごとにサンプリングする位置数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("YURIFT キャッシュキー安定性計測ツール")
+    print("=" * 50 + "\n")
+
+    async def run_and_close():
+        try:
+            await run(args)
+        finally:
+            await supabase_service.close()
+
+    asyncio.run(run_and_close())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+キャッチフレーズ事前生成スクリプト
+onsen_masterの全施設 × 気分（支配的なVibe 1個 × Sensation 1個）のキャッチフレーズを生成し、
+catchphrase_precomputedテーブルに保存する（APIはDrift検索でOpenAIより先に参照）
+
+使い方:
+1. data/sql/05_create_catchphrase_precomputed.sql を実行
+2. .env.localにOpenAI / Supabase認証情報を設定
+3. リポジトリのルートで python data/scripts/precompute_catchphrases.py を実行
+
+オプション:
+  --vibes forest,snow      対象のVibe（デフォルト: 全12種）
+  --sensations トロトロ     対象のSensation（デフォルト: 全8種）
+  --batch-size 12          1回のAPI呼び出しで生成する件数
+  --rpm 30                 1分あたりの最大API呼び出し数
+  --max-requests 100       今回の実行で行うAPI呼び出しの上限
+  --dry-run                生成対象の件数だけ表示
+
+中断しても、再実行すれば生成済みの組み合わせはスキップして続きから生成する
+（バッチごとに保存するため、失敗したバッチ以外は失われない）
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+# リポジトリのルートからapiパッケージを読み込む
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from openai import RateLimitError  # noqa: E402
+from api.models.request import ALLOWED_SENSATIONS  # noqa: E402
+from api.services.catchphrase_service import mood_signature  # noqa: E402
+from api.services.openai_service import openai_service, DEFAULT_CATCHPHRASE  # noqa: E402
+from api.services.supabase_client import supabase_service  # noqa: E402
+from api.utils.vibe_mapping import VIBE_KEYWORDS  # noqa: E402
+
+# (施設, Vibe, Sensation)
+Job = Tuple[Dict[str, Any], str, str]
+
+
+class RequestPacer:
+    """API呼び出しの間隔を1分あたりrpm回以下に保つ"""
+
+    def __init__(self, rpm: int):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._next_at = time.monotonic() + self.interval
+
+
+def parse_choices(value: str, allowed: List[str], label: str) -> List[str]:
+    """カンマ区切りの選択肢をパース（未指定なら全件）"""
+    if not value:
+        return list(allowed)
+
+    choices = [choice.strip() for choice in value.split(",") if choice.strip()]
+    for choice in choices:
+        if choice not in allowed:
+            raise ValueError(f"不正な{label}: {choice}")
+    return choices
+
+
+def build_jobs(
+    facilities: List[Dict[str, Any]],
+    vibes: List[str],
+    sensations: List[str],
+    done: Set[Tuple[int, str]],
+) -> List[Job]:
+    """
+    未生成の (施設, Vibe, Sensation) を列挙
+
+    Args:
+        facilities: 施設リスト
+        vibes: 対象のVibe
+        sensations: 対象のSensation
+        done: 生成済みの (施設ID, 気分の正規化キー)
+
+    Returns:
+        ジョブのリスト（施設ID順）
+    """
+    jobs = []
+    for facility in facilities:
+        for vibe in vibes:
+            for sensation in sensations:
+                if (facility["id"], mood_signature([vibe], [sensation])) not in done:
+                    jobs.append((facility, vibe, sensation))
+    return jobs
+
+
+async def generate_with_retry(jobs: List[Job], max_retries: int) -> List[str]:
+    """
+    キャッチフレーズを生成（レート制限時は指数バックオフで再試行）
+
+    Args:
+        jobs: ジョブのリスト
+        max_retries: 最大再試行回数
+
+    Returns:
+        キャッチフレーズのリスト（jobsの順序と対応）
+    """
+    batch = [(facility, [vibe], [sensation]) for facility, vibe, sensation in jobs]
+
+    for attempt in range(max_retries + 1):
+        try:
+            return await openai_service.generate_catchphrase_batch(batch)
+        except RateLimitError:
+            if attempt == max_retries:
+                raise
+            delay = 2 ** attempt * 5
+            print(f"  ⏳ レート制限: {delay}秒待機して再試行 ({attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+
+
+async def precompute(args: argparse.Namespace) -> None:
+    """事前生成のメイン処理"""
+    vibes = parse_choices(args.vibes, list(VIBE_KEYWORDS), "Vibe")
+    sensations = parse_choices(args.sensations, ALLOWED_SENSATIONS, "Sensation")
+
+    facilities = await supabase_service.fetch_all_onsen()
+    existing = await supabase_service.fetch_precomputed_catchphrases(
+        columns="facility_id,mood_signature"
+    )
+    done = {(row["facility_id"], row["mood_signature"]) for row in existing}
+
+    jobs = build_jobs(facilities, vibes, sensations, done)
+    batches = [jobs[i : i + args.batch_size] for i in range(0, len(jobs), args.batch_size)]
+
+    total = len(facilities) * len(vibes) * len(sensations)
+    print(f"施設: {len(facilities)} 件 / 気分: {len(vibes)} × {len(sensations)} 通り")
+    print(f"生成済み: {total - len(jobs)} 件 / 未生成: {len(jobs)} 件")
+    print(f"API呼び出し: {len(batches)} 回（{args.batch_size}件/回、最大{args.rpm}回/分）\n")
+
+    if args.dry_run:
+        return
+
+    if args.max_requests:
+        batches = batches[: args.max_requests]
+
+    pacer = RequestPacer(args.rpm)
+    success_count = 0
+    error_count = 0
+
+    for i, batch in enumerate(batches, 1):
+        await pacer.wait()
+        try:
+            catchphrases = await generate_with_retry(batch, args.max_retries)
+
+            # パース失敗（デフォルト）は保存せず、次回の実行で再生成する
+            rows = [
+                {
+                    "facility_id": facility["id"],
+                    "mood_signature": mood_signature([vibe], [sensation]),
+                    "catchphrase": catchphrase,
+                    "model": openai_service.model,
+                }
+                for (facility, vibe, sensation), catchphrase in zip(batch, catchphrases)
+                if catchphrase != DEFAULT_CATCHPHRASE
+            ]
+            if rows:
+                await supabase_service.upsert_precomputed_catchphrases(rows)
+
+            print(f"✅ [{i}/{len(batches)}] {len(rows)}/{len(batch)} 件保存")
+            success_count += len(rows)
+            error_count += len(batch) - len(rows)
+
+        except Exception as e:
+            print(f"❌ [{i}/{len(batches)}] エラー: {str(e)}")
+            error_count += len(batch)
+
+    print(f"\n完了！")
+    print(f"成功: {success_count} 件")
+    print(f"失敗: {error_count} 件（再実行で再生成）")
+    print(f"使用トークン: {openai_service.prompt_tokens + openai_service.completion_tokens}")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="キャッチフレーズ事前生成")
+    parser.add_argument("--vibes", default="", help="対象のVibe（カンマ区切り、デフォルト: 全件）")
+    parser.add_argument("--sensations", default="", help="対象のSensation（カンマ区切り、デフォルト: 全件）")
+    parser.add_argument("--batch-size", type=int, default=12, help="1回のAPI呼び出しで生成する件数")
+    parser.add_argument("--rpm", type=int, default=30, help="1分あたりの最大API呼び出し数")
+    parser.add_argument("--max-requests", type=int, default=0, help="API呼び出しの上限（0: 無制限）")
+    parser.add_argument("--max-retries", type=int, default=5, help="レート制限時の最大再試行回数")
+    parser.add_argument("--dry-run", action="store_true", help="生成対象の件数だけ表示")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("YURIFT キャッチフレーズ事前生成ツール")
+    print("=" * 50 + "\n")
+
+    async def run():
+        try:
+            await precompute(args)
+        finally:
+            await openai_service.close()
+            await supabase_service.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
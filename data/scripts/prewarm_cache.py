@@ -0,0 +1,284 @@
+"""
+キャッシュ事前投入スクリプト
+よく検索される (Vibe, Sensation, 量子化した位置) の組み合わせをDrift検索と同じ処理で実行し、
+デプロイやキャッシュ削除の後、ユーザーより先にsearch_cacheを埋める
+
+使い方:
+1. .env.localにOpenAI / Supabase認証情報を設定
+2. リポジトリのルートで python data/scripts/prewarm_cache.py --dry-run を実行（費用の見積もり）
+3. python data/scripts/prewarm_cache.py で実行
+
+オプション:
+  --log requests.jsonl   リクエストログ（1行1リクエストのJSON）から集計
+                         {"vibes", "sensations", "location"} または {"search_params": {...}}
+  --scan 5000            ログ未指定時: search_cacheから読む件数（保存日時の新しい順）
+  --top 200              事前投入する組み合わせ数（検索回数の多い順）
+  --concurrency 4        同時に実行する検索数
+  --input-price 0.15     入力トークンの単価（USD / 100万トークン）
+  --output-price 0.60    出力トークンの単価（USD / 100万トークン）
+  --dry-run              OpenAIを呼ばずに対象件数と費用の見積もりだけ表示
+
+集計方法:
+- キャッシュキーと同じく Vibe・Sensation（順不同）と量子化した位置でまとめる
+- ログ指定時は出現回数の多い順。search_cacheは1キー1行のため、保存日時の新しい順
+- ソフトTTL内のキャッシュがある組み合わせ・施設なしエリアはスキップ
+- 見積もりは、キャッシュにも事前生成にもないキャッチフレーズ（施設 × 気分）の数から計算
+  （入力は1文字1トークンで多めに見積もる）
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# リポジトリのルートからapiパッケージを読み込む
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from fastapi import HTTPException  # noqa: E402
+from api.models.request import DriftRequest  # noqa: E402
+from api.routes.drift import run_drift_search  # noqa: E402
+from api.services.cache_service import cache_service  # noqa: E402
+from api.services.catchphrase_service import catchphrase_service, mood_signature  # noqa: E402
+from api.services.catchphrase_store import precomputed_catchphrases  # noqa: E402
+from api.services.facility_index import facility_index  # noqa: E402
+from api.services.openai_service import openai_service  # noqa: E402
+from api.services.search_engine import search_engine  # noqa: E402
+from api.services.supabase_client import supabase_service  # noqa: E402
+
+
+@dataclass
+class Candidate:
+    """事前投入の対象"""
+
+    request: DriftRequest
+    search_params: Dict[str, Any]
+    count: int
+
+
+def load_log(path: str) -> List[Dict[str, Any]]:
+    """
+    リクエストログから検索パラメータを読み込む
+
+    Args:
+        path: JSONLファイルのパス
+
+    Returns:
+        search_paramsのリスト（読めない行はスキップ）
+    """
+    params = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                params.append(entry.get("search_params", entry))
+    return params
+
+
+def rank(params: List[Dict[str, Any]], top: int) -> Tuple[List[Candidate], int]:
+    """
+    キャッシュキー単位でまとめて多い順に並べる（同数なら先に出現した順）
+
+    Args:
+        params: search_paramsのリスト
+        top: 上位何件を返すか
+
+    Returns:
+        (対象のリスト, 不正なパラメータの件数)
+    """
+    counts: Counter = Counter()
+    representatives: Dict[str, Candidate] = {}
+    invalid = 0
+
+    for search_params in params:
+        try:
+            request = DriftRequest(**search_params)
+        except Exception:
+            invalid += 1
+            continue
+
+        normalized = {
+            "vibes": request.vibes,
+            "sensations": request.sensations,
+            "location": {"lat": request.location.lat, "lng": request.location.lng},
+        }
+        key = cache_service.cache_key(normalized)
+        counts[key] += 1
+        if key not in representatives:
+            representatives[key] = Candidate(request, normalized, 0)
+
+    candidates = []
+    for key, count in counts.most_common(top):
+        candidate = representatives[key]
+        candidate.count = count
+        candidates.append(candidate)
+
+    return candidates, invalid
+
+
+async def plan(
+    candidate: Candidate, seen: Set[Tuple[int, str]]
+) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """
+    事前投入が必要か判定し、OpenAIの使用トークン数を見積もる
+
+    Args:
+        candidate: 対象
+        seen: 見積もり済みの (施設ID, 気分の正規化キー)（組み合わせ間の重複を数えない）
+
+    Returns:
+        (判定: "cached" | "empty" | "warm", (入力トークン数, 出力トークン数) または None)
+    """
+    if cache_service.is_empty_area(candidate.search_params):
+        return "empty", None
+
+    cached = await cache_service.get(candidate.search_params)
+    if cached and not cached.stale:
+        return "cached", None
+
+    request = candidate.request
+    facilities = await search_engine.search(
+        vibes=request.vibes,
+        sensations=request.sensations,
+        user_lat=request.location.lat,
+        user_lng=request.location.lng,
+        max_distance_km=50.0,
+    )
+    if not facilities:
+        return "empty", None
+
+    signature = mood_signature(request.vibes, request.sensations)
+    missing = [
+        facility
+        for facility in catchphrase_service.missing_facilities(
+            facilities[:3], request.vibes, request.sensations
+        )
+        if (facility["id"], signature) not in seen
+    ]
+    if not missing:
+        return "warm", None
+
+    seen.update((facility["id"], signature) for facility in missing)
+    return "warm", openai_service.estimate_tokens(missing, request.vibes, request.sensations)
+
+
+async def warm(candidate: Candidate) -> str:
+    """
+    Drift検索と同じ処理で検索・キャッチフレーズ生成・キャッシュ保存を行う
+
+    Returns:
+        "warmed" | "empty" | "error"
+    """
+    try:
+        await run_drift_search(candidate.request, candidate.search_params)
+        return "warmed"
+    except HTTPException:
+        return "empty"
+    except Exception as e:
+        print(f"❌ {candidate.search_params}: {str(e)}")
+        return "error"
+
+
+async def prewarm(args: argparse.Namespace) -> None:
+    """事前投入のメイン処理"""
+    if args.log:
+        params = load_log(args.log)
+        source = f"リクエストログ {args.log}"
+    else:
+        params = await cache_service.fetch_recent_search_params(args.scan)
+        source = "search_cache"
+
+    # 検索・位置の量子化は施設インデックス、キャッチフレーズは事前生成を使う（APIと同じ状態にする）
+    await facility_index.load()
+    if precomputed_catchphrases.enabled:
+        await precomputed_catchphrases.load()
+
+    candidates, invalid = rank(params, args.top)
+    print(f"集計元: {source}（{len(params)} 件、不正 {invalid} 件）")
+    print(f"対象: 上位 {len(candidates)} 通り\n")
+    if not candidates:
+        return
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    seen: Set[Tuple[int, str]] = set()
+
+    async def plan_one(candidate: Candidate):
+        async with semaphore:
+            return await plan(candidate, seen)
+
+    plans = await asyncio.gather(*(plan_one(candidate) for candidate in candidates))
+    targets = [candidate for candidate, (status, _) in zip(candidates, plans) if status == "warm"]
+    estimates = [tokens for _, tokens in plans if tokens]
+
+    prompt_tokens = sum(tokens[0] for tokens in estimates)
+    completion_tokens = sum(tokens[1] for tokens in estimates)
+    cost = (prompt_tokens * args.input_price + completion_tokens * args.output_price) / 1_000_000
+    statuses = Counter(status for status, _ in plans)
+
+    print(f"キャッシュ済み: {statuses['cached']} 通り / 施設なし: {statuses['empty']} 通り")
+    print(f"事前投入: {len(targets)} 通り（うちOpenAI呼び出し: {len(estimates)} 回）")
+    print(f"見積もり: 入力 {prompt_tokens} + 出力 {completion_tokens} トークン ≒ ${cost:.4f}\n")
+
+    if args.dry_run or not targets:
+        return
+
+    # 締め切りで代替キャッチフレーズになった結果はキャッシュされないため、生成を待つ
+    catchphrase_service.deadline_seconds = 0
+    cache_service.start()
+
+    async def warm_one(candidate: Candidate) -> str:
+        async with semaphore:
+            return await warm(candidate)
+
+    try:
+        results = Counter(await asyncio.gather(*(warm_one(candidate) for candidate in targets)))
+    finally:
+        # 書き込みキューの残りを保存
+        await cache_service.stop()
+
+    print(f"\n完了！")
+    print(f"事前投入: {results['warmed']} 通り")
+    print(f"施設なし: {results['empty']} 通り / 失敗: {results['error']} 通り")
+    print(f"使用トークン: {openai_service.prompt_tokens + openai_service.completion_tokens}")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="キャッシュ事前投入")
+    parser.add_argument("--log", default="", help="リクエストログ（JSONL）のパス")
+    parser.add_argument("--scan", type=int, default=5000, help="ログ未指定時にsearch_cacheから読む件数")
+    parser.add_argument("--top", type=int, default=200, help="事前投入する組み合わせ数")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時に実行する検索数")
+    parser.add_argument("--input-price", type=float, default=0.15, help="入力単価（USD / 100万トークン）")
+    parser.add_argument("--output-price", type=float, default=0.60, help="出力単価（USD / 100万トークン）")
+    parser.add_argument("--dry-run", action="store_true", help="対象件数と費用の見積もりだけ表示")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency は1以上を指定してください")
+
+    print("=" * 50)
+    print("YURIFT キャッシュ事前投入ツール")
+    print("=" * 50 + "\n")
+
+    async def run():
+        try:
+            await prewarm(args)
+        finally:
+            await openai_service.close()
+            await supabase_service.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
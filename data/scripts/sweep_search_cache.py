@@ -0,0 +1,80 @@
+"""
+期限切れキャッシュ削除スクリプト
+search_cacheの期限切れ行をexpires_atの古い順にバッチごとに削除する
+（API起動中はバックグラウンドで定期実行されるため、溜まった分を手動で消す場合に使う）
+
+使い方:
+1. data/sql/06_create_delete_expired_search_cache.sql を実行
+2. .env.localにSupabase認証情報を設定
+3. リポジトリのルートで python data/scripts/sweep_search_cache.py を実行
+
+オプション:
+  --batch-size 500   1バッチで削除する最大件数
+  --pause 0.5        バッチ間の待機秒数
+  --max-batches 0    最大バッチ数（0: 期限切れがなくなるまで）
+  --dry-run          期限切れの件数だけ表示
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# リポジトリのルートからapiパッケージを読み込む
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from api.services.cache_service import cache_service  # noqa: E402
+from api.services.cache_sweeper import cache_sweeper  # noqa: E402
+from api.services.supabase_client import supabase_service  # noqa: E402
+
+
+async def sweep(args: argparse.Namespace) -> None:
+    """削除のメイン処理"""
+    expired = await cache_service.count_expired()
+    batches = -(-expired // args.batch_size)
+    print(f"期限切れ: {expired} 件（{args.batch_size}件/バッチ × 約{batches}回）\n")
+
+    if args.dry_run or not expired:
+        return
+
+    started_at = time.monotonic()
+    deleted = await cache_sweeper.sweep(
+        batch_size=args.batch_size,
+        pause_seconds=args.pause,
+        max_batches=args.max_batches,
+    )
+    elapsed = time.monotonic() - started_at
+
+    print(f"✅ 削除: {deleted} 件（{elapsed:.1f}秒）")
+    if args.max_batches and deleted < expired:
+        print(f"残り: 約{expired - deleted} 件（再実行で続きを削除）")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="期限切れキャッシュ削除")
+    parser.add_argument("--batch-size", type=int, default=500, help="1バッチで削除する最大件数")
+    parser.add_argument("--pause", type=float, default=0.5, help="バッチ間の待機秒数")
+    parser.add_argument("--max-batches", type=int, default=0, help="最大バッチ数（0: 無制限）")
+    parser.add_argument("--dry-run", action="store_true", help="期限切れの件数だけ表示")
+    args = parser.parse_args()
+
+    if args.batch_size < 1:
+        parser.error("--batch-size は1以上を指定してください")
+
+    print("=" * 50)
+    print("YURIFT 期限切れキャッシュ削除ツール")
+    print("=" * 50 + "\n")
+
+    async def run():
+        try:
+            await sweep(args)
+        finally:
+            await supabase_service.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+-- ============================================
+-- Migration: 04_create_search_onsen_nearby
+-- Date: 2026-10-18
+-- Author: @yurift
+-- Description: 半径内の温泉施設を距離順に返す検索関数を作成（固定±0.45度の矩形検索を置き換え）
+-- Rollback: 04_rollback_create_search_onsen_nearby.sql
+-- Dependencies: 01
+-- ============================================
+
+-- ▼▼▼ Migration Start ▼▼▼
+
+-- ========================================
+-- 1. 関数作成
+-- ========================================
+
+-- 1. 緯度に応じた矩形範囲で idx_onsen_location (lat, lng) を使って候補を絞り込む
+--    （経度方向は範囲内で最も極に近い緯度のcosで補正）
+-- 2. Haversine公式で距離を計算し、半径内の施設のみを残す
+--    （アプリ側と同じく小数点第2位に丸めて判定）
+-- 3. 距離の昇順で p_limit 件を返す
+CREATE OR REPLACE FUNCTION search_onsen_nearby(
+    p_lat DOUBLE PRECISION,
+    p_lng DOUBLE PRECISION,
+    p_radius_km DOUBLE PRECISION DEFAULT 50.0,
+    p_limit INTEGER DEFAULT 100
+)
+RETURNS TABLE (
+    id BIGINT,
+    name TEXT,
+    address TEXT,
+    lat DOUBLE PRECISION,
+    lng DOUBLE PRECISION,
+    price INTEGER,
+    keywords TEXT[],
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    distance_km DOUBLE PRECISION
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH box AS (
+        SELECT
+            p_radius_km / 111.0 AS lat_delta,
+            LEAST(
+                p_radius_km / (
+                    111.0 * GREATEST(cos(radians(LEAST(abs(p_lat) + p_radius_km / 111.0, 90.0))), 1e-6)
+                ),
+                180.0
+            ) AS lng_delta
+    ),
+    candidates AS (
+        SELECT
+            o.*,
+            6371.0 * 2 * asin(sqrt(
+                power(sin(radians(o.lat - p_lat) / 2), 2)
+                + cos(radians(p_lat)) * cos(radians(o.lat)) * power(sin(radians(o.lng - p_lng) / 2), 2)
+            )) AS distance
+        FROM onsen_master o, box
+        WHERE o.lat BETWEEN p_lat - box.lat_delta AND p_lat + box.lat_delta
+            AND o.lng BETWEEN p_lng - box.lng_delta AND p_lng + box.lng_delta
+    )
+    SELECT
+        c.id,
+        c.name,
+        c.address,
+        c.lat,
+        c.lng,
+        c.price,
+        c.keywords,
+        c.created_at,
+        c.updated_at,
+        round(c.distance::numeric, 2)::DOUBLE PRECISION AS distance_km
+    FROM candidates c
+    WHERE round(c.distance::numeric, 2) <= p_radius_km
+    ORDER BY c.distance, c.id
+    LIMIT p_limit;
+$$;
+
+-- ========================================
+-- 2. コメント追加（ドキュメント）
+-- ========================================
+COMMENT ON FUNCTION search_onsen_nearby(DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, INTEGER)
+    IS '半径内の温泉施設を距離の昇順で取得（Drift検索の候補取得用）';
+
+-- ▲▲▲ Migration End ▲▲▲
+
+-- ============================================
+-- Verification (実行後の確認用クエリ)
+-- ============================================
+
+-- 関数存在確認
+-- SELECT proname FROM pg_proc WHERE proname = 'search_onsen_nearby';
+
+-- 東京駅から50km以内の施設を距離順に取得
+-- SELECT id, name, distance_km FROM search_onsen_nearby(35.6812, 139.7671, 50.0, 10);
+
+-- 実行計画確認（idx_onsen_location が使われること）
+-- EXPLAIN ANALYZE SELECT * FROM search_onsen_nearby(35.6812, 139.7671, 50.0, 100);
+
+-- ============================================
+-- Notes
+-- ============================================
+-- - 通常の検索はAPI側のインメモリ施設インデックス（グリッド）で処理される
+-- - この関数はインデックス未ロード時のフォールバック
+-- - 施設数が数万件規模になった場合はPostGIS（geography + GiST）への移行を検討
+-- ============================================
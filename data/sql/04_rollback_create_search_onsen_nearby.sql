@@ -0,0 +1,37 @@
+-- ============================================
+-- Rollback Migration: 04_rollback_create_search_onsen_nearby
+-- Date: 2026-10-18
+-- Author: @yurift
+-- Description: Rollback for 04_create_search_onsen_nearby.sql
+-- Original Migration: 04_create_search_onsen_nearby.sql
+-- ============================================
+
+-- ⚠️ WARNING: ロールバック後、施設インデックス未ロード時のフォールバック検索が失敗します
+-- アプリケーションのsearch_onsen_by_location_and_keywordsを戻してから実行してください
+
+-- ▼▼▼ Rollback Start ▼▼▼
+
+-- ========================================
+-- 1. 関数削除
+-- ========================================
+
+DROP FUNCTION IF EXISTS search_onsen_nearby(DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION, INTEGER);
+
+-- ▲▲▲ Rollback End ▲▲▲
+
+-- ============================================
+-- Verification (実行後の確認用クエリ)
+-- ============================================
+
+-- 関数が削除されたことを確認（0件のはず）
+SELECT COUNT(*) as function_count
+FROM pg_proc
+WHERE proname = 'search_onsen_nearby';
+
+-- ============================================
+-- Rollback完了後の手順
+-- ============================================
+-- 1. data/sql/README.md の履歴テーブルを更新
+-- 2. ステータスを "🔴 Rolled Back" に変更
+-- 3. Gitコミット
+-- ============================================
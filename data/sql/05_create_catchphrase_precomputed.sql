@@ -0,0 +1,86 @@
+-- ============================================
+-- Migration: 05_create_catchphrase_precomputed
+-- Date: 2026-10-18
+-- Author: @yurift
+-- Description: 施設 × 気分（支配的なVibe/Sensation）ごとの事前生成キャッチフレーズを格納
+-- Rollback: 05_rollback_create_catchphrase_precomputed.sql
+-- Dependencies: 01
+-- ============================================
+
+-- ▼▼▼ Migration Start ▼▼▼
+
+-- ========================================
+-- 1. テーブル作成
+-- ========================================
+
+CREATE TABLE IF NOT EXISTS catchphrase_precomputed (
+    -- 施設ID（施設削除時はキャッチフレーズも削除）
+    facility_id BIGINT NOT NULL REFERENCES onsen_master (id) ON DELETE CASCADE,
+
+    -- 気分の正規化キー（例: "forest|トロトロ"）
+    mood_signature TEXT NOT NULL,
+
+    -- キャッチフレーズ
+    catchphrase TEXT NOT NULL,
+
+    -- 生成モデル
+    model TEXT,
+
+    -- メタデータ
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (facility_id, mood_signature)
+);
+
+-- ========================================
+-- 2. インデックス作成
+-- ========================================
+
+-- 更新検知用（件数 + 最新created_at）
+CREATE INDEX IF NOT EXISTS idx_catchphrase_created ON catchphrase_precomputed (created_at);
+
+-- ========================================
+-- 3. RLS (Row Level Security) 設定
+-- ========================================
+
+-- RLS有効化（書き込みはサービスロールキーのバッチのみ）
+ALTER TABLE catchphrase_precomputed ENABLE ROW LEVEL SECURITY;
+
+-- 読み取りポリシー
+CREATE POLICY catchphrase_reads ON catchphrase_precomputed
+    FOR SELECT
+    USING (true);
+
+-- ========================================
+-- 4. コメント追加（ドキュメント）
+-- ========================================
+COMMENT ON TABLE catchphrase_precomputed IS '事前生成キャッチフレーズ（data/scripts/precompute_catchphrases.py で生成）';
+COMMENT ON COLUMN catchphrase_precomputed.facility_id IS '施設ID';
+COMMENT ON COLUMN catchphrase_precomputed.mood_signature IS '支配的なVibe/Sensationの正規化キー（"vibe|sensation"）';
+COMMENT ON COLUMN catchphrase_precomputed.catchphrase IS 'キャッチフレーズ（15文字以内）';
+COMMENT ON COLUMN catchphrase_precomputed.model IS '生成に使用したモデル';
+COMMENT ON COLUMN catchphrase_precomputed.created_at IS '作成日時';
+
+-- ▲▲▲ Migration End ▲▲▲
+
+-- ============================================
+-- Verification (実行後の確認用クエリ)
+-- ============================================
+
+-- テーブル存在確認
+-- SELECT EXISTS (
+--     SELECT FROM information_schema.tables
+--     WHERE table_schema = 'public'
+--     AND table_name = 'catchphrase_precomputed'
+-- );
+
+-- 施設ごとの生成済み件数
+-- SELECT facility_id, COUNT(*) FROM catchphrase_precomputed GROUP BY facility_id ORDER BY facility_id;
+
+-- ============================================
+-- Notes
+-- ============================================
+-- - 最大件数: 施設数 × Vibe 12 × Sensation 8 = 施設あたり96件
+-- - APIは起動時に全件メモリへロードし、Drift検索ではOpenAIより先に参照する
+-- - 生成バッチは再実行可能（生成済みの組み合わせはスキップ）
+-- ============================================
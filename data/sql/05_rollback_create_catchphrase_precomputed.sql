@@ -0,0 +1,52 @@
+-- ============================================
+-- Rollback Migration: 05_rollback_create_catchphrase_precomputed
+-- Date: 2026-10-18
+-- Author: @yurift
+-- Description: Rollback for 05_create_catchphrase_precomputed.sql
+-- Original Migration: 05_create_catchphrase_precomputed.sql
+-- ============================================
+
+-- ⚠️ WARNING: このスクリプトは事前生成キャッチフレーズを削除します
+-- 実行後、Drift検索のキャッチフレーズはすべてOpenAIで生成されます
+-- （先に CATCHPHRASE_PRECOMPUTED_ENABLED=false を設定してください）
+
+-- ▼▼▼ Rollback Start ▼▼▼
+
+-- ========================================
+-- 1. RLSポリシー削除
+-- ========================================
+
+DROP POLICY IF EXISTS catchphrase_reads ON catchphrase_precomputed;
+
+-- ========================================
+-- 2. インデックス削除
+-- ========================================
+
+DROP INDEX IF EXISTS idx_catchphrase_created;
+
+-- ========================================
+-- 3. テーブル削除
+-- ========================================
+
+DROP TABLE IF EXISTS catchphrase_precomputed CASCADE;
+
+-- ▲▲▲ Rollback End ▲▲▲
+
+-- ============================================
+-- Verification (実行後の確認用クエリ)
+-- ============================================
+
+-- テーブルが削除されたことを確認（false が返るはず）
+SELECT EXISTS (
+    SELECT FROM information_schema.tables
+    WHERE table_schema = 'public'
+    AND table_name = 'catchphrase_precomputed'
+) as table_exists;
+
+-- ============================================
+-- Rollback完了後の手順
+-- ============================================
+-- 1. data/sql/README.md の履歴テーブルを更新
+-- 2. ステータスを "🔴 Rolled Back" に変更
+-- 3. Gitコミット
+-- ============================================
@@ -0,0 +1,76 @@
+-- ============================================
+-- Migration: 06_create_delete_expired_search_cache
+-- Date: 2026-10-18
+-- Author: @yurift
+-- Description: 期限切れの検索キャッシュを上限件数ずつ削除する関数を作成
+-- Rollback: 06_rollback_create_delete_expired_search_cache.sql
+-- Dependencies: 02
+-- ============================================
+
+-- ▼▼▼ Migration Start ▼▼▼
+
+-- ========================================
+-- 1. 関数作成
+-- ========================================
+
+-- 1. idx_cache_expires (expires_at) を使って期限切れの古い順に p_batch_size 件を選ぶ
+--    （他の削除処理がロック中の行はスキップし、複数ワーカーが同時に実行しても待ち合わせない）
+-- 2. 選んだ行だけを削除し、削除件数だけを返す（削除した行のJSONは返さない）
+CREATE OR REPLACE FUNCTION delete_expired_search_cache(
+    p_batch_size INTEGER DEFAULT 500
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    deleted_count INTEGER;
+BEGIN
+    WITH expired AS (
+        SELECT cache_key
+        FROM search_cache
+        WHERE expires_at < CURRENT_TIMESTAMP
+        ORDER BY expires_at
+        LIMIT p_batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM search_cache s
+    USING expired e
+    WHERE s.cache_key = e.cache_key;
+
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    RETURN deleted_count;
+END;
+$$;
+
+-- ========================================
+-- 2. コメント追加（ドキュメント）
+-- ========================================
+COMMENT ON FUNCTION delete_expired_search_cache(INTEGER)
+    IS '期限切れの検索キャッシュを古い順に最大p_batch_size件削除し、削除件数を返す';
+
+-- ▲▲▲ Migration End ▲▲▲
+
+-- ============================================
+-- Verification (実行後の確認用クエリ)
+-- ============================================
+
+-- 関数存在確認
+-- SELECT proname FROM pg_proc WHERE proname = 'delete_expired_search_cache';
+
+-- 期限切れ件数の確認
+-- SELECT COUNT(*) FROM search_cache WHERE expires_at < CURRENT_TIMESTAMP;
+
+-- 100件だけ削除
+-- SELECT delete_expired_search_cache(100);
+
+-- 実行計画確認（idx_cache_expires が使われること）
+-- EXPLAIN ANALYZE SELECT cache_key FROM search_cache
+--     WHERE expires_at < CURRENT_TIMESTAMP ORDER BY expires_at LIMIT 500;
+
+-- ============================================
+-- Notes
+-- ============================================
+-- - API起動中はバックグラウンドで定期実行される（CACHE_SWEEP_* 設定）
+-- - 手動実行: python data/scripts/sweep_search_cache.py
+-- - 1回の呼び出しが1トランザクション。バッチ間の待機は呼び出し側で行う
+-- ============================================
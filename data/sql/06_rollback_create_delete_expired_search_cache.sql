@@ -0,0 +1,37 @@
+-- ============================================
+-- Rollback Migration: 06_rollback_create_delete_expired_search_cache
+-- Date: 2026-10-18
+-- Author: @yurift
+-- Description: Rollback for 06_create_delete_expired_search_cache.sql
+-- Original Migration: 06_create_delete_expired_search_cache.sql
+-- ============================================
+
+-- ⚠️ WARNING: ロールバック後、期限切れキャッシュの自動削除が失敗します
+-- 先に CACHE_SWEEP_ENABLED=false を設定してください
+
+-- ▼▼▼ Rollback Start ▼▼▼
+
+-- ========================================
+-- 1. 関数削除
+-- ========================================
+
+DROP FUNCTION IF EXISTS delete_expired_search_cache(INTEGER);
+
+-- ▲▲▲ Rollback End ▲▲▲
+
+-- ============================================
+-- Verification (実行後の確認用クエリ)
+-- ============================================
+
+-- 関数が削除されたことを確認（0件のはず）
+SELECT COUNT(*) as function_count
+FROM pg_proc
+WHERE proname = 'delete_expired_search_cache';
+
+-- ============================================
+-- Rollback完了後の手順
+-- ============================================
+-- 1. data/sql/README.md の履歴テーブルを更新
+-- 2. ステータスを "🔴 Rolled Back" に変更
+-- 3. Gitコミット
+-- ============================================